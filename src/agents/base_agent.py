@@ -1,81 +1,248 @@
+import asyncio
+import contextvars
+import json
+import logging
 import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Type
+
+import httpx
 from dotenv import load_dotenv
 from langchain.agents import initialize_agent, Tool, AgentType
+from langchain.prompts import PromptTemplate
+from pydantic import BaseModel, ValidationError
 from langchain_openai import ChatOpenAI
-from services.candidate_service import get_candidate_topics, list_candidates, get_candidate_by_id
-from services.job_service import get_job_requirements, list_jobs, get_job_by_id
-from services.course_service import get_course_details, search_courses_by_topic, list_courses, get_course_by_id
+from agents.schemas import with_summary
+from services.tracing import span, traced, tracing_handler
+from services.candidate_service import get_candidate_topics, get_candidate_by_id
+from services.job_service import get_job_requirements, get_job_by_id
+from services.course_service import get_course_details, search_courses_by_topic, get_course_by_id
+from services.tool_views import (
+    list_candidates_compact, list_jobs_compact, list_courses_compact, topic_frequencies, top_matches,
+)
+
+load_dotenv()  # take variables from .env
+
+logger = logging.getLogger(__name__)
+
+
+@traced("parse_json")
+def _parse_llm_json(raw: str) -> Dict[str, Any]:
+    """
+    Extract and parse the first valid JSON object/array from the LLM response.
+    Cleans away markdown fences and extra explanations.
+    """
+    try:
+        cleaned = raw.strip()
+
+        # Remove fenced code block markers like ```json ... ```
+        cleaned = re.sub(r"^```[a-zA-Z]*", "", cleaned, flags=re.MULTILINE)
+        cleaned = re.sub(r"```$", "", cleaned, flags=re.MULTILINE).strip()
+
+        # Try to find the first {...} or [...] block
+        match = re.search(r"(\{.*\}|\[.*\])", cleaned, flags=re.DOTALL)
+        if match:
+            return json.loads(match.group(1))
+
+        # If no block is found, attempt direct parsing
+        return json.loads(cleaned)
+
+    except Exception as e:
+        return {"error": f"Failed to parse JSON: {str(e)}", "raw": raw}
+
+
+def _inline(func):
+    """
+    Async version of an O(1) service tool (a lookup by id). It answers from
+    memory, so the call runs directly on the event loop instead of hopping
+    to an executor thread. The data files were already (re)loaded off the
+    loop when the endpoint resolved its cache key.
+    """
+    async def coroutine(*args, **kwargs):
+        return func(*args, **kwargs)
+    return coroutine
+
+
+def _threaded(func):
+    """
+    Async version of a service tool that scans or ranks whole datasets (or
+    may build an index first): it runs in a worker thread so it doesn't
+    stall every other request on the event loop.
+    """
+    async def coroutine(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return coroutine
+
+
+# Set by a caller that wants progress events: aexecute() then streams
+# {"event": "step" | "observation" | "token", ...} dicts into this callable.
+# Being a context variable, it reaches the agent through tasks spawned on the way.
+event_sink = contextvars.ContextVar("agent_event_sink", default=None)
+
+
+@dataclass
+class ReactTask:
+    """
+    A question for the ReAct agent. If json_prompt is set, the agent's prose
+    answer is passed to it as {summary} (plus `fields`) to extract JSON.
+    With a schema and structured output enabled, the agent is asked to answer
+    in that schema directly and json_prompt is only the fallback.
+    If `context` holds every record the question needs, the prefetch mode
+    skips the ReAct tool loop and answers from it in a single LLM call.
+    """
+    query: str
+    json_prompt: Optional[PromptTemplate] = None
+    fields: Dict[str, Any] = field(default_factory=dict)
+    schema: Optional[Type[BaseModel]] = None
+    context: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class NarrationTask:
+    """
+    A result already computed without the LLM. If prompt is set, one LLM call
+    narrates it and the text replaces `summary` (and fills explanation_field).
+    """
+    structured: Dict[str, Any]
+    summary: str = ""
+    prompt: Optional[str] = None
+    explanation_field: Optional[str] = None
+
+# ✅ All services available to every agent (built once per process)
+TOOLS = [
+    Tool(
+        name="Candidate Service",
+        func=get_candidate_topics,
+        coroutine=_inline(get_candidate_topics),
+        description="Get candidate info by candidate_id. Returns JSON with id, name, and topics with scores."
+    ),
+    Tool(
+        name="Job Service",
+        func=get_job_requirements,
+        coroutine=_inline(get_job_requirements),
+        description="Get job requirements by job_id. Returns JSON with id, title, and required_topics with scores."
+    ),
+    Tool(
+        name="Course Service",
+        func=get_course_details,
+        coroutine=_inline(get_course_details),
+        description="Get course details by course_id. Returns JSON with id, title, and topics list."
+    ),
+    Tool(
+        name="Course Search",
+        func=search_courses_by_topic,
+        coroutine=_threaded(search_courses_by_topic),
+        description="Search for courses covering a given topic. Input is topic name (e.g. 'Probability'); append '*' to match a topic prefix (e.g. 'Prob*')."
+    ),
+    Tool(
+        name="List Candidates",
+        func=list_candidates_compact,
+        coroutine=_threaded(list_candidates_compact),
+        description="List candidates one page at a time (id, name, top topics). Input is the offset to start from (empty for the first page); use next_offset from the result for the next page."
+    ),
+    Tool(
+        name="List Jobs",
+        func=list_jobs_compact,
+        coroutine=_threaded(list_jobs_compact),
+        description="List jobs one page at a time (id, title, top required topics). Input is the offset to start from (empty for the first page); use next_offset from the result for the next page."
+    ),
+    Tool(
+        name="List Courses",
+        func=list_courses_compact,
+        coroutine=_threaded(list_courses_compact),
+        description="List courses one page at a time (id, title, topics). Input is the offset to start from (empty for the first page); use next_offset from the result for the next page."
+    ),
+    Tool(
+        name="Topic Frequency",
+        func=topic_frequencies,
+        coroutine=_threaded(topic_frequencies),
+        description="Count how many jobs, candidates or courses mention each topic, most frequent first. Input is 'jobs', 'candidates' or 'courses', optionally with how many topics to return (e.g. 'jobs 10')."
+    ),
+    Tool(
+        name="Top Matches",
+        func=top_matches,
+        coroutine=_threaded(top_matches),
+        description="Best-matching candidates for a job ('job 101') or best jobs for a candidate ('candidate 1'), with match score and missing topics. Add 'top 10' to change how many (default 5)."
+    ),
+    Tool(
+        name="Candidate By ID",
+        func=get_candidate_by_id,
+        coroutine=_inline(get_candidate_by_id),
+        description="Return candidate details given a candidate ID. Returns JSON with id, name, and topics."
+    ),
+    Tool(
+        name="Job By ID",
+        func=get_job_by_id,
+        coroutine=_inline(get_job_by_id),
+        description="Return job details given a job ID. Returns JSON with id, title, and required_topics."
+    ),
+    Tool(
+        name="Course By ID",
+        func=get_course_by_id,
+        coroutine=_inline(get_course_by_id),
+        description="Return course details given a course ID. Returns JSON with id, title, and topics."
+    ),
+]
+
+
+# One ChatOpenAI per model for the whole process. Each wraps a pooled,
+# keep-alive HTTP client, so agents built later reuse open connections
+# instead of paying a new TLS handshake.
+_shared_llms = {}
+_shared_llms_lock = threading.Lock()
+
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+
+
+def get_shared_llm(model: str = "gpt-4o-mini") -> ChatOpenAI:
+    """Return the process-wide ChatOpenAI client for `model`, creating it on first use."""
+    llm = _shared_llms.get(model)
+    if llm is not None:
+        return llm
+
+    with _shared_llms_lock:
+        llm = _shared_llms.get(model)
+        if llm is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY not set. Did you load .env?")
+            llm = _shared_llms[model] = ChatOpenAI(
+                model=model,
+                temperature=0,
+                api_key=api_key,
+                http_client=httpx.Client(limits=HTTP_LIMITS),
+                http_async_client=httpx.AsyncClient(limits=HTTP_LIMITS),
+            )
+        return llm
 
 
 class BaseAgent:
-    def __init__(self, name, llm=None, verbose=True, model="gpt-4o-mini"):
+    """
+    Agents hold no per-query state (the ReAct executor has no memory), so a
+    single instance can serve concurrent requests from several threads.
+    """
+
+    def __init__(self, name, llm=None, verbose=None, model="gpt-4o-mini", structured_output=None,
+                 prefetch_context=None):
         self.name = name
+        self.tools = TOOLS
+        # LangChain's step-by-step console output; off unless AGENT_VERBOSE=1.
+        # Timings and token counts come from services.tracing instead.
+        if verbose is None:
+            verbose = os.getenv("AGENT_VERBOSE", "0") == "1"
+        if structured_output is None:
+            structured_output = os.getenv("AGENT_STRUCTURED_OUTPUT", "1") == "1"
+        self.structured_output = structured_output
+        if prefetch_context is None:
+            prefetch_context = os.getenv("AGENT_PREFETCH_CONTEXT", "1") == "1"
+        self.prefetch_context = prefetch_context
 
-        load_dotenv()  # take variables from .env
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not set. Did you load .env?")
-
-        # ✅ All services available to every agent
-        self.tools = [
-            Tool(
-                name="Candidate Service",
-                func=get_candidate_topics,
-                description="Get candidate info by candidate_id. Returns JSON with id, name, and topics with scores."
-            ),
-            Tool(
-                name="Job Service",
-                func=get_job_requirements,
-                description="Get job requirements by job_id. Returns JSON with id, title, and required_topics with scores."
-            ),
-            Tool(
-                name="Course Service",
-                func=get_course_details,
-                description="Get course details by course_id. Returns JSON with id, title, and topics list."
-            ),
-            Tool(
-                name="Course Search",
-                func=search_courses_by_topic,
-                description="Search for courses covering a given topic. Input is topic name (e.g. 'Probability')."
-            ),
-            Tool(
-                name="List Candidates",
-                func=list_candidates,
-                description="List all candidates from the dataset."
-            ),
-            Tool(
-                name="List Jobs",
-                func=list_jobs,
-                description="List all jobs from the dataset."
-            ),
-            Tool(
-                name="List Courses",
-                func=list_courses,
-                description="List all courses from the dataset."
-            ),
-            Tool(
-                name="Candidate By ID",
-                func=get_candidate_by_id,
-                description="Return candidate details given a candidate ID. Returns JSON with id, name, and topics."
-            ),
-            Tool(
-                name="Job By ID",
-                func=get_job_by_id,
-                description="Return job details given a job ID. Returns JSON with id, title, and required_topics."
-            ),
-            Tool(
-                name="Course By ID",
-                func=get_course_by_id,
-                description="Return course details given a course ID. Returns JSON with id, title, and topics."
-            ),
-        ]
-
-        # ✅ Default LLM is ChatOpenAI with GPT-4o-mini
-        self.llm = llm or ChatOpenAI(
-            model=model,
-            temperature=0,
-            api_key=api_key
-        )
+        # ✅ Default LLM is the shared ChatOpenAI client for `model`
+        self.llm = llm or get_shared_llm(model)
+        # Passed per call so nested LLM and tool runs report to the tracer too.
+        self.run_config = {"callbacks": [tracing_handler]}
 
         self.agent = initialize_agent(
             tools=self.tools,
@@ -85,5 +252,156 @@ class BaseAgent:
         )
 
     def run(self, query: str):
-        print(f"\n[{self.name} Agent] Running query: {query}")
-        return self.agent.run(query)
+        logger.info("[%s Agent] Running query: %s", self.name, query)
+        with span("react_run", agent=self.name):
+            return self.agent.invoke({"input": query}, config=self.run_config)["output"]
+
+    async def arun(self, query: str):
+        logger.info("[%s Agent] Running query: %s", self.name, query)
+        with span("react_run", agent=self.name):
+            result = await self.agent.ainvoke({"input": query}, config=self.run_config)
+        return result["output"]
+
+    def execute(self, task):
+        """Run a ReactTask or NarrationTask and return {"summary", "structured"}."""
+        with span("agent_execute", agent=self.name):
+            return self._execute(task)
+
+    def _execute(self, task):
+        if isinstance(task, NarrationTask):
+            if task.prompt is None:
+                return self._narrated(task, task.summary)
+            return self._narrated(task, self.llm.invoke(task.prompt, config=self.run_config).content.strip())
+
+        if self._uses_context(task):
+            answer = self.llm.invoke(self._context_prompt(task), config=self.run_config).content
+        else:
+            answer = self.run(self._query(task))
+        result = self._structured_answer(task, answer)
+        if result is not None:
+            return result
+        if task.json_prompt is None:
+            return answer
+        with span("extract_json", agent=self.name):
+            structured = self.llm.invoke(task.json_prompt.format(summary=answer, **task.fields), config=self.run_config)
+        return {"summary": answer, "structured": _parse_llm_json(structured.content)}
+
+    async def aexecute(self, task):
+        """
+        Async twin of execute(), using the LangChain async APIs.
+        If the caller set event_sink, agent steps and LLM tokens are streamed
+        into it while the task runs.
+        """
+        with span("agent_execute", agent=self.name):
+            return await self._aexecute(task)
+
+    async def _aexecute(self, task):
+        emit = event_sink.get()
+        if isinstance(task, NarrationTask):
+            if task.prompt is None:
+                return self._narrated(task, task.summary)
+            narration = await self._agenerate(task.prompt, emit)
+            return self._narrated(task, narration.strip())
+
+        if self._uses_context(task):
+            answer = await self._agenerate(self._context_prompt(task), emit)
+        elif emit is None:
+            answer = await self.arun(self._query(task))
+        else:
+            with span("react_run", agent=self.name):
+                answer = await self._arun_streaming(self._query(task), emit)
+        result = self._structured_answer(task, answer)
+        if result is not None:
+            return result
+        if task.json_prompt is None:
+            return answer
+        with span("extract_json", agent=self.name):
+            structured = await self.llm.ainvoke(
+                task.json_prompt.format(summary=answer, **task.fields), config=self.run_config
+            )
+        return {"summary": answer, "structured": _parse_llm_json(structured.content)}
+
+    async def _agenerate(self, prompt: str, emit=None) -> str:
+        """One LLM call; with `emit`, its tokens are streamed out as they arrive."""
+        if emit is None:
+            return (await self.llm.ainvoke(prompt, config=self.run_config)).content
+        text = ""
+        async for chunk in self.llm.astream(prompt, config=self.run_config):
+            if chunk.content:
+                emit({"event": "token", "text": chunk.content})
+                text += chunk.content
+        return text
+
+    async def _arun_streaming(self, query: str, emit) -> str:
+        """arun() that streams the ReAct loop: tool calls, tool results and LLM tokens."""
+        logger.info("[%s Agent] Running query: %s", self.name, query)
+        answer = ""
+        async for ev in self.agent.astream_events({"input": query}, config=self.run_config, version="v2"):
+            kind = ev["event"]
+            if kind == "on_chat_model_stream":
+                if ev["data"]["chunk"].content:
+                    emit({"event": "token", "text": ev["data"]["chunk"].content})
+            elif kind == "on_chain_stream" and not ev["parent_ids"]:
+                for action in ev["data"]["chunk"].get("actions", []):
+                    emit({"event": "step", "tool": action.tool, "input": str(action.tool_input)})
+            elif kind == "on_tool_end":
+                emit({"event": "observation", "tool": ev["name"], "output": str(ev["data"].get("output"))})
+            elif kind == "on_chain_end" and not ev["parent_ids"]:
+                answer = ev["data"]["output"]["output"]
+        return answer
+
+    def _uses_schema(self, task: ReactTask) -> bool:
+        return self.structured_output and task.schema is not None
+
+    def _uses_context(self, task: ReactTask) -> bool:
+        return self.prefetch_context and task.context is not None
+
+    def _query(self, task: ReactTask) -> str:
+        if not self._uses_schema(task):
+            return task.query
+        schema = json.dumps(with_summary(task.schema).model_json_schema())
+        return (
+            f"{task.query}\n\n"
+            f"Your Final Answer must be only a JSON object matching this JSON schema, "
+            f"with your natural language answer in its \"summary\" field:\n{schema}"
+        )
+
+    def _context_prompt(self, task: ReactTask) -> str:
+        """Single-call prompt: the question plus the pre-fetched records it refers to."""
+        if self._uses_schema(task):
+            schema = json.dumps(with_summary(task.schema).model_json_schema())
+            answer_format = (
+                f"Respond with only a JSON object matching this JSON schema, "
+                f"with your natural language answer in its \"summary\" field:\n{schema}"
+            )
+        else:
+            answer_format = "Answer in plain prose."
+        return (
+            f"Answer the question using the data below. It already contains every "
+            f"record the question refers to.\n\n"
+            f"Question: {task.query}\n\n"
+            f"Data:\n{json.dumps(task.context)}\n\n"
+            f"{answer_format}"
+        )
+
+    def _structured_answer(self, task: ReactTask, answer: str):
+        """
+        Validate a structured-output final answer against the task schema.
+        Returns {"summary", "structured"}, or None to fall back to extraction.
+        """
+        if not self._uses_schema(task):
+            return None
+        data = _parse_llm_json(answer)
+        if not isinstance(data, dict) or "raw" in data:
+            return None
+        try:
+            parsed = with_summary(task.schema).model_validate(data)
+        except ValidationError:
+            return None
+        return {"summary": parsed.summary, "structured": parsed.model_dump(exclude={"summary"})}
+
+    @staticmethod
+    def _narrated(task: NarrationTask, summary: str):
+        if task.explanation_field and task.prompt is not None:
+            task.structured[task.explanation_field] = summary
+        return {"summary": summary, "structured": task.structured}
@@ -1,101 +1,143 @@
+import asyncio
 import json
-import re
 from typing import Dict, Any
-from dotenv import load_dotenv
-import os
 
-from agents.base_agent import BaseAgent
+from agents.base_agent import BaseAgent, NarrationTask, ReactTask
+from agents.schemas import RelevantJobs, SkillsReport
 from langchain.prompts import PromptTemplate
-
-
-def _parse_llm_json(raw: str) -> Dict[str, Any]:
-    """
-    Extract and parse the first valid JSON object/array from the LLM response.
-    Cleans away markdown fences and extra explanations.
-    """
-    try:
-        cleaned = raw.strip()
-
-        # Remove fenced code block markers like ```json ... ```
-        cleaned = re.sub(r"^```[a-zA-Z]*", "", cleaned, flags=re.MULTILINE)
-        cleaned = re.sub(r"```$", "", cleaned, flags=re.MULTILINE).strip()
-
-        # Try to find the first {...} or [...] block
-        match = re.search(r"(\{.*\}|\[.*\])", cleaned, flags=re.DOTALL)
-        if match:
-            return json.loads(match.group(1))
-
-        # If no block is found, attempt direct parsing
-        return json.loads(cleaned)
-
-    except Exception as e:
-        return {"error": f"Failed to parse JSON: {str(e)}", "raw": raw}
+from services.candidate_service import get_candidate_by_id
+from services.career_planner import plan_career_path
+from services.course_service import courses_covering
+from services.skill_gap_engine import compute_skill_gap
 
 
 class CandidateAgent(BaseAgent):
-    def __init__(self):
-        super().__init__(name="Candidate")
-
-    def getSkillGap(self, candidate_id: int, job_id: int) -> Dict[str, Any]:
-        query = (
-            f"What is the skill gap between candidate id {candidate_id} "
-            f"and job id {job_id}? Mention the topic and gap pairs in the summary. "
-            f"Suggest courses that can fill the gap."
-        )
-        summary = self.run(query)
-
-        json_prompt = PromptTemplate.from_template("""
-        Extract structured JSON from the following summary.
-
-        Summary:
-        {summary}
-
-        Return JSON with the following format:
-        {{
-          "candidate_id": {candidate_id},
-          "job_id": {job_id},
-          "gaps": [ {{ "topic": str, "gap": float }} ],
-          "courses": [ {{ "id": int, "title": str, "topics": [str] }} ],
-          "explanation": str
-        }}
+    def __init__(self, **kwargs):
+        # kwargs go to BaseAgent, e.g. llm= to run without OpenAI
+        super().__init__(name="Candidate", **kwargs)
+
+    def getSkillGap(self, candidate_id: int, job_id: int, explain: bool = True, gap=None) -> Dict[str, Any]:
+        return self.execute(self._skillGapTask(candidate_id, job_id, explain, gap))
+
+    async def agetSkillGap(self, candidate_id: int, job_id: int, explain: bool = True, gap=None) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._skillGapTask, candidate_id, job_id, explain, gap))
+
+    def _skillGapTask(self, candidate_id: int, job_id: int, explain: bool, gap=None) -> NarrationTask:
+        """
+        Numeric gaps come from the vectorized skill-gap engine (or `gap`, when a
+        batch already computed them); the LLM is only asked (optionally) for
+        the narrative explanation.
+        """
+        if gap is None:
+            gap = compute_skill_gap(candidate_id, job_id)
+        if "error" in gap:
+            return NarrationTask(structured=gap, summary=gap["error"])
+
+        covering = courses_covering(g["topic"] for g in gap["gaps"])
+        courses = [
+            {"id": c["id"], "title": c["title"], "topics": c["topics"]}
+            for c in (covering if isinstance(covering, list) else [])
+        ]
+
+        structured = {**gap, "courses": courses, "explanation": ""}
+        if gap["gaps"]:
+            summary = "Topic gaps: " + ", ".join(f"{g['topic']} ({g['gap']})" for g in gap["gaps"]) + "."
+        else:
+            summary = f"Candidate {candidate_id} already meets every requirement of job {job_id}."
+
+        if not explain:
+            return NarrationTask(structured=structured, summary=summary)
+
+        explain_prompt = PromptTemplate.from_template("""
+        Candidate id {candidate_id} is being compared with job id {job_id}.
+        These skill gaps (required level minus current level) were computed exactly:
+        {gaps}
+
+        These courses cover the missing topics:
+        {courses}
+
+        In a short paragraph, explain the gaps and which courses fill them.
+        Do not change any of the numbers.
         """)
-        structured = self.llm.invoke(
-            json_prompt.format(summary=summary, candidate_id=candidate_id, job_id=job_id)
+        return NarrationTask(
+            structured=structured,
+            summary=summary,
+            prompt=explain_prompt.format(
+                candidate_id=candidate_id,
+                job_id=job_id,
+                gaps=json.dumps(gap["gaps"]),
+                courses=json.dumps(courses),
+            ),
+            explanation_field="explanation",
         )
 
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
-
-    def getCareerPath(self, candidate_id: int, desired_job_id: int) -> Dict[str, Any]:
-        query = (
-            f"Candidate id {candidate_id} wants to become job id {desired_job_id}. "
-            f"Suggest a learning path and milestones with timelines."
-        )
-        summary = self.run(query)
-
-        json_prompt = PromptTemplate.from_template("""
-        Extract structured JSON from the following summary.
-
-        Summary:
-        {summary}
-
-        Return JSON with the following format:
-        {{
-          "candidate_id": {candidate_id},
-          "job_id": {desired_job_id},
-          "milestones": [ {{ "topic": str, "target_level": float, "suggested_courses": [str] }} ],
-          "timeline_months": int,
-          "explanation": str
-        }}
+    def getCareerPath(self, candidate_id: int, desired_job_id: int, explain: bool = True) -> Dict[str, Any]:
+        return self.execute(self._careerPathTask(candidate_id, desired_job_id, explain))
+
+    async def agetCareerPath(self, candidate_id: int, desired_job_id: int, explain: bool = True) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._careerPathTask, candidate_id, desired_job_id, explain))
+
+    def _careerPathTask(self, candidate_id: int, desired_job_id: int, explain: bool = True) -> NarrationTask:
+        """
+        Milestones, their order and the timeline come from the graph-based
+        career planner; the LLM is only asked (optionally) to narrate them.
+        """
+        plan = plan_career_path(candidate_id, desired_job_id)
+        if "error" in plan:
+            return NarrationTask(structured=plan, summary=plan["error"])
+
+        structured = {**plan, "explanation": ""}
+        if plan["milestones"]:
+            summary = (
+                f"{len(plan['milestones'])} milestones over {plan['timeline_months']} months: "
+                + ", ".join(
+                    f"{m['topic']} to {m['target_level']} (months {m['start_month']}-{m['end_month']})"
+                    for m in plan["milestones"]
+                )
+                + "."
+            )
+        else:
+            summary = f"Candidate {candidate_id} already meets every requirement of job {desired_job_id}."
+
+        if not explain or not plan["milestones"]:
+            return NarrationTask(structured=structured, summary=summary)
+
+        explain_prompt = PromptTemplate.from_template("""
+        Candidate id {candidate_id} wants to become job id {job_id}.
+        This learning plan was computed exactly; milestones are in start order,
+        months count from today, and a milestone starts only after its prerequisites:
+        {milestones}
+
+        How prerequisites were inferred: {prerequisite_rule}
+
+        Total timeline: {timeline_months} months. Critical path (the milestones that
+        set the timeline, back to back): {critical_path}.
+
+        In a short paragraph, walk the candidate through the plan and the suggested courses.
+        Do not change any of the numbers or the order of the milestones.
         """)
-        structured = self.llm.invoke(
-            json_prompt.format(summary=summary, candidate_id=candidate_id, desired_job_id=desired_job_id)
+        return NarrationTask(
+            structured=structured,
+            summary=summary,
+            prompt=explain_prompt.format(
+                candidate_id=candidate_id,
+                job_id=desired_job_id,
+                milestones=json.dumps(plan["milestones"]),
+                timeline_months=plan["timeline_months"],
+                critical_path=" -> ".join(plan["critical_path"]),
+                prerequisite_rule=plan["prerequisite_rule"],
+            ),
+            explanation_field="explanation",
         )
 
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
-
     def getSkillsReport(self, candidate_id: int) -> Dict[str, Any]:
+        return self.execute(self._skillsReportTask(candidate_id))
+
+    async def agetSkillsReport(self, candidate_id: int) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._skillsReportTask, candidate_id))
+
+    def _skillsReportTask(self, candidate_id: int) -> ReactTask:
         query = f"Candidate id {candidate_id}: summarize strengths, weaknesses, and opportunities in topics."
-        summary = self.run(query)
 
         json_prompt = PromptTemplate.from_template("""
         Extract structured JSON from the following summary.
@@ -111,16 +153,20 @@ class CandidateAgent(BaseAgent):
           "opportunities": [ {{ "topic": str, "recommendation": str }} ]
         }}
         """)
-        structured = self.llm.invoke(json_prompt.format(summary=summary, candidate_id=candidate_id))
-
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+        context = {"candidate": get_candidate_by_id(candidate_id)}
+        return ReactTask(query, json_prompt, {"candidate_id": candidate_id}, schema=SkillsReport, context=context)
 
     def getRelevantJobsForCandidate(self, candidate_id: int) -> Dict[str, Any]:
+        return self.execute(self._relevantJobsTask(candidate_id))
+
+    async def agetRelevantJobsForCandidate(self, candidate_id: int) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._relevantJobsTask, candidate_id))
+
+    def _relevantJobsTask(self, candidate_id: int) -> ReactTask:
         query = (
             f"List the most relevant jobs for candidate id {candidate_id} based on their skills. "
             f"For each job, include a match score, required gaps, and why it is suitable."
         )
-        summary = self.run(query)
 
         json_prompt = PromptTemplate.from_template("""
         Extract structured JSON from the following summary.
@@ -142,9 +188,7 @@ class CandidateAgent(BaseAgent):
           ]
         }}
         """)
-        structured = self.llm.invoke(json_prompt.format(summary=summary, candidate_id=candidate_id))
-
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+        return ReactTask(query, json_prompt, {"candidate_id": candidate_id}, schema=RelevantJobs)
 
 
 if __name__ == "__main__":
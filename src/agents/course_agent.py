@@ -1,49 +1,82 @@
+import asyncio
 import json
-import re
 from typing import Dict, Any, List
 from langchain.prompts import PromptTemplate
-from agents.base_agent import BaseAgent
+from agents.base_agent import BaseAgent, NarrationTask, ReactTask
+from services.candidate_service import topic_level_summary
+from services.course_bundle import solve_course_bundle
+from services.course_service import get_course_by_id
+from services.job_service import jobs_requiring
+from services.market_analytics import co_required_topics, emerging_topics, in_demand_topics
+from agents.schemas import CompetitorAnalysis, CourseCoverage, CourseImprovements, CourseMarketFit, SuggestedCourses
 
 
-def _parse_llm_json(raw: str) -> Dict[str, Any]:
-    """
-    Extract and parse the first valid JSON object/array from the LLM response.
-    Cleans away markdown fences and extra explanations.
-    """
-    try:
-        cleaned = raw.strip()
-
-        # Remove fenced code block markers like ```json ... ```
-        cleaned = re.sub(r"^```[a-zA-Z]*", "", cleaned, flags=re.MULTILINE)
-        cleaned = re.sub(r"```$", "", cleaned, flags=re.MULTILINE).strip()
-
-        # Try to find the first {...} or [...] block
-        match = re.search(r"(\{.*\}|\[.*\])", cleaned, flags=re.DOTALL)
-        if match:
-            return json.loads(match.group(1))
-
-        # If no block is found, attempt direct parsing
-        return json.loads(cleaned)
-
-    except Exception as e:
-        return {"error": f"Failed to parse JSON: {str(e)}", "raw": raw}
+class CourseAgent(BaseAgent):
+    def __init__(self, **kwargs):
+        # kwargs go to BaseAgent, e.g. llm= to run without OpenAI
+        super().__init__(name="Course", **kwargs)
 
+    def getCoursesForSkillGap(self, candidate_id: int, job_id: int, explain: bool = True) -> Dict[str, Any]:
+        return self.execute(self._coursesForSkillGapTask(candidate_id, job_id, explain))
 
-class CourseAgent(BaseAgent):
-    def __init__(self):
-        super().__init__(name="Course")
+    async def agetCoursesForSkillGap(self, candidate_id: int, job_id: int, explain: bool = True) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._coursesForSkillGapTask, candidate_id, job_id, explain))
 
-    def getCoursesForSkillGap(self, candidate_id: int, job_id: int):
+    def _coursesForSkillGapTask(self, candidate_id: int, job_id: int, explain: bool = True) -> NarrationTask:
         """
-        Ask the agent to recommend courses for filling candidate-job skill gap.
+        The course bundle comes from the set-cover solver over the course topic
+        index; the LLM is only asked (optionally) to justify the choice.
         """
-        query = (
-            f"Given candidate id {candidate_id} and job id {job_id}, "
-            f"which courses best fill the missing topics?"
+        bundle = solve_course_bundle(candidate_id, job_id)
+        if "error" in bundle:
+            return NarrationTask(structured=bundle, summary=bundle["error"])
+
+        structured = {**bundle, "justification": ""}
+        if not bundle["missing_topics"]:
+            summary = f"Candidate {candidate_id} already meets every requirement of job {job_id}; no courses needed."
+        else:
+            summary = "Recommended courses: " + "; ".join(
+                f"{c['title']} (covers {', '.join(c['covers'])})" for c in bundle["courses"]
+            ) + "."
+            if bundle["uncovered_topics"]:
+                summary += " No course covers: " + ", ".join(bundle["uncovered_topics"]) + "."
+
+        if not explain or not bundle["missing_topics"]:
+            return NarrationTask(structured=structured, summary=summary)
+
+        explain_prompt = PromptTemplate.from_template("""
+        Candidate id {candidate_id} is missing these topics for job id {job_id}
+        (gap = required level minus current level):
+        {gaps}
+
+        This is the smallest-cost set of courses covering them, with the topics each covers:
+        {courses}
+
+        Topics no course covers: {uncovered}
+
+        In a short paragraph, justify this selection to the candidate.
+        Do not add, remove or reorder courses, and do not change any numbers.
+        """)
+        return NarrationTask(
+            structured=structured,
+            summary=summary,
+            prompt=explain_prompt.format(
+                candidate_id=candidate_id,
+                job_id=job_id,
+                gaps=json.dumps(bundle["missing_topics"]),
+                courses=json.dumps(bundle["courses"]),
+                uncovered=json.dumps(bundle["uncovered_topics"]),
+            ),
+            explanation_field="justification",
         )
-        return self.run(query)
 
     def analyzeCourseCoverage(self, course_ids: List[int], target_topics: List[str]) -> Dict[str, Any]:
+        return self.execute(self._analyzeCourseCoverageTask(course_ids, target_topics))
+
+    async def aanalyzeCourseCoverage(self, course_ids: List[int], target_topics: List[str]) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._analyzeCourseCoverageTask, course_ids, target_topics))
+
+    def _analyzeCourseCoverageTask(self, course_ids: List[int], target_topics: List[str]) -> ReactTask:
         """
         Analyze how well courses cover target skills.
         """
@@ -51,7 +84,6 @@ class CourseAgent(BaseAgent):
             f"Given courses {course_ids} and target topics {target_topics}, "
             f"analyze which skills are covered, which are partially covered, and which are missing."
         )
-        summary = self.run(query)
 
         json_prompt = PromptTemplate.from_template("""
         Extract structured JSON from the following summary.
@@ -64,11 +96,15 @@ class CourseAgent(BaseAgent):
           "courses": [ {{ "id": int, "title": str, "covered_topics": [str], "missing_topics": [str] }} ]
         }}
         """)
-        structured = self.llm.invoke(json_prompt.format(summary=summary))
-
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+        return ReactTask(query, json_prompt, schema=CourseCoverage)
 
     def suggestNewCourses(self, missing_topics: List[str]) -> Dict[str, Any]:
+        return self.execute(self._suggestNewCoursesTask(missing_topics))
+
+    async def asuggestNewCourses(self, missing_topics: List[str]) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._suggestNewCoursesTask, missing_topics))
+
+    def _suggestNewCoursesTask(self, missing_topics: List[str]) -> ReactTask:
         """
         Suggest courses to cover missing skills.
         """
@@ -76,7 +112,6 @@ class CourseAgent(BaseAgent):
             f"Suggest new courses that cover the missing topics: {missing_topics}. "
             f"Provide course title, topics, and expected skill level."
         )
-        summary = self.run(query)
 
         json_prompt = PromptTemplate.from_template("""
         Extract structured JSON from the following summary.
@@ -89,11 +124,15 @@ class CourseAgent(BaseAgent):
           "suggested_courses": [ {{ "title": str, "topics": [str], "skill_level": str }} ]
         }}
         """)
-        structured = self.llm.invoke(json_prompt.format(summary=summary))
-
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+        return ReactTask(query, json_prompt, schema=SuggestedCourses)
 
     def getCourseImprovementSuggestions(self, course_id: int) -> Dict[str, Any]:
+        return self.execute(self._courseImprovementSuggestionsTask(course_id))
+
+    async def agetCourseImprovementSuggestions(self, course_id: int) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._courseImprovementSuggestionsTask, course_id))
+
+    def _courseImprovementSuggestionsTask(self, course_id: int) -> ReactTask:
         """
         Suggest improvements for a given course by comparing it with job requirements
         and candidate skill gaps.
@@ -104,7 +143,6 @@ class CourseAgent(BaseAgent):
             f"Suggest improvements to the course such as adding missing topics, updating outdated topics, "
             f"or providing more practical exercises."
         )
-        summary = self.run(query)
 
         json_prompt = PromptTemplate.from_template("""
         Extract structured JSON from the following summary.
@@ -121,38 +159,53 @@ class CourseAgent(BaseAgent):
           "practical_exercises": [str]
         }}
         """)
-        structured = self.llm.invoke(json_prompt.format(summary=summary))
+        return ReactTask(query, json_prompt, schema=CourseImprovements)
 
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+    def getMostInDemandTopics(self, explain: bool = True) -> Dict[str, Any]:
+        return self.execute(self._mostInDemandTopicsTask(explain))
 
-    def getMostInDemandTopics(self) -> Dict[str, Any]:
+    async def agetMostInDemandTopics(self, explain: bool = True) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._mostInDemandTopicsTask, explain))
+
+    def _mostInDemandTopicsTask(self, explain: bool = True) -> NarrationTask:
         """
         Identify the most in-demand topics across all jobs,
         regardless of whether courses already cover them.
+        Demand figures come from the precomputed market analytics; the LLM only
+        (optionally) narrates them.
         """
-        query = (
-            "Analyze the job requirements across all jobs. "
-            "Identify the most frequently requested topics and skills in the job market. "
-            "Rank them by demand, without considering existing course coverage."
+        rows = in_demand_topics()
+        topics = [
+            {"topic": r["topic"], "demand_score": r["demand"], "average_level": r["average_level"]}
+            for r in rows
+        ]
+        structured = {"in_demand_topics": topics, "explanation": ""}
+        summary = "Most requested topics: " + ", ".join(f"{t['topic']} ({t['demand_score']} jobs)" for t in topics) + "."
+        if not explain:
+            return NarrationTask(structured=structured, summary=summary)
+
+        explain_prompt = PromptTemplate.from_template("""
+        These topics are the most requested across all jobs
+        (demand = number of jobs requiring the topic, average_level = mean required level):
+        {table}
+
+        In a short paragraph, describe what the job market asks for most.
+        Do not change the order or the numbers.
+        """)
+        return NarrationTask(
+            structured=structured,
+            summary=summary,
+            prompt=explain_prompt.format(table=json.dumps(rows)),
+            explanation_field="explanation",
         )
-        summary = self.run(query)
-
-        json_prompt = PromptTemplate.from_template("""
-        Extract structured JSON from the following summary.
-
-        Summary:
-        {summary}
 
-        Return JSON with the following format:
-        {{
-          "in_demand_topics": [{{ "topic": str, "demand_score": int }}]
-        }}
-        """)
-        structured = self.llm.invoke(json_prompt.format(summary=summary))
+    def getCourseMarketFit(self, course_id: int) -> Dict[str, Any]:
+        return self.execute(self._courseMarketFitTask(course_id))
 
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+    async def agetCourseMarketFit(self, course_id: int) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._courseMarketFitTask, course_id))
 
-    def getCourseMarketFit(self, course_id: int) -> Dict[str, Any]:
+    def _courseMarketFitTask(self, course_id: int) -> ReactTask:
         """
         Evaluate how well a given course matches industry demand and candidate needs.
         """
@@ -160,7 +213,6 @@ class CourseAgent(BaseAgent):
             f"Evaluate course with id {course_id} against the skill requirements in jobs and current candidate skills. "
             f"Determine how well this course addresses market demand and where it falls short."
         )
-        summary = self.run(query)
 
         json_prompt = PromptTemplate.from_template("""
         Extract structured JSON from the following summary.
@@ -176,11 +228,20 @@ class CourseAgent(BaseAgent):
           "market_fit_score": int
         }}
         """)
-        structured = self.llm.invoke(json_prompt.format(summary=summary))
-
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+        course = get_course_by_id(course_id)
+        context = {"course": course}
+        if "error" not in course:
+            context["jobs_requiring_course_topics"] = jobs_requiring(course["topics"])
+            context["candidate_levels_in_course_topics"] = topic_level_summary(course["topics"])
+        return ReactTask(query, json_prompt, schema=CourseMarketFit, context=context)
 
     def getCourseCompetitorAnalysis(self, course_id: int) -> Dict[str, Any]:
+        return self.execute(self._courseCompetitorAnalysisTask(course_id))
+
+    async def agetCourseCompetitorAnalysis(self, course_id: int) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._courseCompetitorAnalysisTask, course_id))
+
+    def _courseCompetitorAnalysisTask(self, course_id: int) -> ReactTask:
         """
         Compare a course with other courses covering similar topics.
         Highlight strengths, weaknesses, and unique differentiators.
@@ -189,7 +250,6 @@ class CourseAgent(BaseAgent):
             f"Compare course with id {course_id} against other courses covering similar topics. "
             f"Highlight strengths, weaknesses, and unique differentiators of this course."
         )
-        summary = self.run(query)
 
         json_prompt = PromptTemplate.from_template("""
         Extract structured JSON from the following summary.
@@ -206,36 +266,64 @@ class CourseAgent(BaseAgent):
           "unique_differentiators": [str]
         }}
         """)
-        structured = self.llm.invoke(json_prompt.format(summary=summary))
+        return ReactTask(query, json_prompt, schema=CompetitorAnalysis)
+
+    def getEmergingTopicsForCourses(self, explain: bool = True) -> Dict[str, Any]:
+        return self.execute(self._emergingTopicsForCoursesTask(explain))
 
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+    async def agetEmergingTopicsForCourses(self, explain: bool = True) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._emergingTopicsForCoursesTask, explain))
 
-    def getEmergingTopicsForCourses(self) -> Dict[str, Any]:
+    def _emergingTopicsForCoursesTask(self, explain: bool = True) -> NarrationTask:
         """
-        Identify emerging or trending topics in jobs that are not yet adequately covered by existing courses.
+        Topics in jobs that are not yet adequately covered by existing courses:
+        demand (jobs asking for a topic, weighted by level) against supply
+        (courses covering it), from the precomputed market analytics. Each
+        topic comes with the data a course creator would start from: the
+        topics jobs ask for alongside it and the roles asking for it. No
+        course titles are made up; the LLM only (optionally) narrates.
         """
-        query = (
-            "Identify emerging or trending topics in jobs that are not yet adequately covered by existing courses. "
-            "Recommend new areas where course creators should develop content."
-        )
-        summary = self.run(query)
-
-        json_prompt = PromptTemplate.from_template("""
-        Extract structured JSON from the following summary.
-
-        Summary:
-        {summary}
-
-        Return JSON with the following format:
-        {{
-          "emerging_topics": [str],
-          "recommended_course_ideas": [{{ "title": str, "topics": [str], "target_audience": str }}]
-        }}
+        rows = emerging_topics()
+        opportunities = [
+            {
+                "topic": r["topic"],
+                "demand": r["demand"],
+                "supply": r["supply"],
+                "co_required_topics": co_required_topics(r["topic"], k=2),
+                "requesting_jobs": [j["title"] for j in jobs_requiring([r["topic"]])][:3],
+            }
+            for r in rows
+        ]
+        structured = {
+            "emerging_topics": [r["topic"] for r in rows],
+            "course_opportunities": opportunities,
+            "topic_gaps": rows,
+            "explanation": "",
+        }
+        summary = "Under-covered topics: " + ", ".join(
+            f"{r['topic']} ({r['demand']} jobs, {r['supply']} courses)" for r in rows
+        ) + "."
+        if not explain:
+            return NarrationTask(structured=structured, summary=summary)
+
+        explain_prompt = PromptTemplate.from_template("""
+        These job topics are covered by fewer courses than there are jobs asking for them
+        (demand = jobs requiring the topic, supply = courses covering it,
+        gap = weighted demand per covering course):
+        {table}
+
+        Topics jobs ask for alongside them, and the roles asking for them:
+        {opportunities}
+
+        In a short paragraph, explain where course creators should develop new content and why.
+        Do not change the order or the numbers.
         """)
-        structured = self.llm.invoke(json_prompt.format(summary=summary))
-
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
-
+        return NarrationTask(
+            structured=structured,
+            summary=summary,
+            prompt=explain_prompt.format(table=json.dumps(rows), opportunities=json.dumps(opportunities)),
+            explanation_field="explanation",
+        )
 
 if __name__ == "__main__":
     course_agent = CourseAgent()
@@ -1,72 +1,55 @@
+import asyncio
 import json
-import re
 from typing import Dict, Any
 from langchain.prompts import PromptTemplate
-from agents.base_agent import BaseAgent
+from agents.base_agent import BaseAgent, NarrationTask, ReactTask
+from agents.schemas import JobSkillsReport
+from services.candidate_service import get_candidate_by_id
+from services.course_service import courses_covering
+from services.job_service import get_job_by_id
+from services.match_engine import top_candidates_for_job
 
-def _parse_llm_json(raw: str) -> Dict[str, Any]:
-    """
-    Extract and parse the first valid JSON object/array from the LLM response.
-    Cleans away markdown fences and extra explanations.
-    """
-    try:
-        cleaned = raw.strip()
 
-        # Remove fenced code block markers like ```json ... ```
-        cleaned = re.sub(r"^```[a-zA-Z]*", "", cleaned, flags=re.MULTILINE)
-        cleaned = re.sub(r"```$", "", cleaned, flags=re.MULTILINE).strip()
-
-        # Try to find the first {...} or [...] block
-        match = re.search(r"(\{.*\}|\[.*\])", cleaned, flags=re.DOTALL)
-        if match:
-            return json.loads(match.group(1))
-
-        # If no block is found, attempt direct parsing
-        return json.loads(cleaned)
-
-    except Exception as e:
-        return {"error": f"Failed to parse JSON: {str(e)}", "raw": raw}
+class JobAgent(BaseAgent):
+    def __init__(self, **kwargs):
+        # kwargs go to BaseAgent, e.g. llm= to run without OpenAI
+        super().__init__(name="Job", **kwargs)
 
+    def getMatchingCandidates(self, job_id: int, top_k: int = 10, explain: bool = True, ranked=None) -> Dict[str, Any]:
+        return self.execute(self._matchingCandidatesTask(job_id, top_k, explain, ranked))
 
-class JobAgent(BaseAgent):
-    def __init__(self):
-        super().__init__(name="Job")
+    async def agetMatchingCandidates(self, job_id: int, top_k: int = 10, explain: bool = True,
+                                     ranked=None) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._matchingCandidatesTask, job_id, top_k, explain, ranked))
 
-    def getMatchingCandidates(self, job_id: int) -> Dict[str, Any]:
+    def _matchingCandidatesTask(self, job_id: int, top_k: int, explain: bool, ranked=None) -> NarrationTask:
         """
         Find candidates matching a job and return both structured data and summary.
+        Ranking comes from the batched match engine (or `ranked`, when a batch
+        already computed it); the LLM only writes the explanation.
         """
-        query = (
-            f"Which candidate ids closely match job id {job_id}? "
-            f"Provide candidate IDs with their match score. "
-            f"Also mention why they are a good fit in the explanation."
+        if ranked is None:
+            ranked = top_candidates_for_job(job_id, k=top_k)
+        if isinstance(ranked, dict):
+            return NarrationTask(structured=ranked, summary=ranked["error"])
+
+        matches = [{"candidate_id": m["candidate_id"], "score": m["score"]} for m in ranked]
+        summary = "Top matches: " + ", ".join(f"candidate {m['candidate_id']} ({m['score']})" for m in matches) + "."
+
+        return NarrationTask(
+            structured={"job_id": job_id, "matches": matches, "explanation": ""},
+            summary=summary,
+            prompt=self._explainRankingPrompt(job_id, ranked) if explain else None,
+            explanation_field="explanation",
         )
-        summary = self.run(query)  # natural language summary
-
-        # Ask LLM to return JSON structure from that summary
-        json_prompt = PromptTemplate.from_template("""
-        Extract structured JSON from the following summary.
 
-        Summary:
-        {summary}
-
-        Return JSON with the following format:
-        {{
-          "job_id": {job_id},
-          "matches": [ {{ "candidate_id": int, "score": float }} ],
-          "explanation": str
-        }}
-        """)
-        structured = self.llm.invoke(
-            json_prompt.format(summary=summary, job_id=job_id)
-        )
+    def getSkillsReportAndJobReadiness(self, candidate_id: int, job_id: int) -> Dict[str, Any]:
+        return self.execute(self._skillsReportAndJobReadinessTask(candidate_id, job_id))
 
-        return {
-            "summary": summary,
-            "structured": _parse_llm_json(structured.content)
-        }
+    async def agetSkillsReportAndJobReadiness(self, candidate_id: int, job_id: int) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._skillsReportAndJobReadinessTask, candidate_id, job_id))
 
-    def getSkillsReportAndJobReadiness(self, candidate_id: int, job_id: int) -> Dict[str, Any]:
+    def _skillsReportAndJobReadinessTask(self, candidate_id: int, job_id: int) -> ReactTask:
         """
         Generate candidate's skill report.
         """
@@ -75,7 +58,6 @@ class JobAgent(BaseAgent):
             f"with respect to job id {job_id}. Also mention the timeline by which the candidate will be ready, "
             f"suggest some courses the candidate should take during that time."
         )
-        summary = self.run(query)
 
         json_prompt = PromptTemplate.from_template("""
         Extract structured JSON from the following summary.
@@ -92,36 +74,61 @@ class JobAgent(BaseAgent):
           "opportunities": [ {{ "topic": str, "recommendation": str }} ]
         }}
         """)
-        structured = self.llm.invoke(
-            json_prompt.format(summary=summary, candidate_id=candidate_id, job_id=job_id)
+        job = get_job_by_id(job_id)
+        context = {
+            "candidate": get_candidate_by_id(candidate_id),
+            "job": job,
+            "courses": courses_covering(job["required_topics"]) if "error" not in job else [],
+        }
+        return ReactTask(
+            query, json_prompt, {"candidate_id": candidate_id, "job_id": job_id},
+            schema=JobSkillsReport, context=context,
         )
 
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+    def explainCandidateRanking(self, job_id: int, top_k: int = 10, explain: bool = True) -> Dict[str, Any]:
+        return self.execute(self._explainCandidateRankingTask(job_id, top_k, explain))
+
+    async def aexplainCandidateRanking(self, job_id: int, top_k: int = 10, explain: bool = True) -> Dict[str, Any]:
+        return await self.aexecute(await asyncio.to_thread(self._explainCandidateRankingTask, job_id, top_k, explain))
 
-    def explainCandidateRanking(self, job_id: int) -> Dict[str, Any]:
+    def _explainCandidateRankingTask(self, job_id: int, top_k: int, explain: bool) -> NarrationTask:
         """
         For candidates matched to a job, provide reasoning for their scores.
+        Scores and per-candidate reasons are computed from the match engine.
         """
-        query = f"For job id {job_id}, explain why each candidate is a strong or weak match."
-        summary = self.run(query)
+        ranked = top_candidates_for_job(job_id, k=top_k)
+        if isinstance(ranked, dict):
+            return NarrationTask(structured=ranked, summary=ranked["error"])
+
+        rankings = [
+            {"candidate_id": m["candidate_id"], "score": m["score"], "reason": _ranking_reason(m)}
+            for m in ranked
+        ]
+
+        return NarrationTask(
+            structured={"job_id": job_id, "candidate_rankings": rankings},
+            summary=" ".join(f"Candidate {r['candidate_id']}: {r['reason']}" for r in rankings),
+            prompt=self._explainRankingPrompt(job_id, ranked) if explain else None,
+        )
 
-        json_prompt = PromptTemplate.from_template("""
-        Extract structured JSON from the following summary.
+    def _explainRankingPrompt(self, job_id: int, ranked) -> str:
+        explain_prompt = PromptTemplate.from_template("""
+        Candidates were ranked against job id {job_id} by a weighted match score
+        (share of the required skill levels they already meet, 1.0 = full match).
+        Ranking, best first, with each candidate's remaining topic gaps:
+        {ranking}
 
-        Summary:
-        {summary}
-
-        Return JSON with the following format:
-        {{
-          "job_id": {job_id},
-          "candidate_rankings": [ {{ "candidate_id": int, "score": float, "reason": str }} ]
-        }}
+        In a short paragraph, explain why the top candidates are strong matches
+        and what the weaker ones are missing. Do not change the order or the scores.
         """)
-        structured = self.llm.invoke(
-            json_prompt.format(summary=summary, job_id=job_id)
-        )
+        return explain_prompt.format(job_id=job_id, ranking=json.dumps(ranked))
+
 
-        return {"summary": summary, "structured": _parse_llm_json(structured.content)}
+def _ranking_reason(match: Dict[str, Any]) -> str:
+    if not match["gaps"]:
+        return f"Meets every required topic level (score {match['score']})."
+    gaps = ", ".join(f"{g['topic']} (-{g['gap']})" for g in match["gaps"])
+    return f"Score {match['score']}; below the required level in {gaps}."
 
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+# Response schemas: each model is the "structured" part of an agent endpoint's
+# response. In structured-output mode the agent's final answer is validated
+# against it (plus a "summary" field) instead of a second extraction call.
+from typing import List
+
+from pydantic import BaseModel, Field, create_model
+
+
+class TopicScore(BaseModel):
+    topic: str
+    score: float
+
+
+class TopicRecommendation(BaseModel):
+    topic: str
+    recommendation: str
+
+
+class SkillsReport(BaseModel):
+    candidate_id: int
+    strengths: List[TopicScore]
+    weaknesses: List[TopicScore]
+    opportunities: List[TopicRecommendation]
+
+
+class JobSkillsReport(SkillsReport):
+    job_id: int
+
+
+class RelevantJob(BaseModel):
+    job_id: int
+    title: str
+    match_score: float
+    missing_topics: List[str]
+    explanation: str
+
+
+class RelevantJobs(BaseModel):
+    candidate_id: int
+    relevant_jobs: List[RelevantJob]
+
+
+class CourseCoverageItem(BaseModel):
+    id: int
+    title: str
+    covered_topics: List[str]
+    missing_topics: List[str]
+
+
+class CourseCoverage(BaseModel):
+    courses: List[CourseCoverageItem]
+
+
+class SuggestedCourse(BaseModel):
+    title: str
+    topics: List[str]
+    skill_level: str
+
+
+class SuggestedCourses(BaseModel):
+    suggested_courses: List[SuggestedCourse]
+
+
+class CourseImprovements(BaseModel):
+    course_id: int
+    improvements: List[str]
+    missing_topics: List[str]
+    outdated_topics: List[str]
+    practical_exercises: List[str]
+
+
+class CourseMarketFit(BaseModel):
+    course_id: int
+    strengths: List[str]
+    gaps: List[str]
+    market_fit_score: int
+
+
+class CourseRef(BaseModel):
+    id: int
+    title: str
+
+
+class CompetitorAnalysis(BaseModel):
+    course_id: int
+    competitors: List[CourseRef]
+    strengths: List[str]
+    weaknesses: List[str]
+    unique_differentiators: List[str]
+
+
+_with_summary_models = {}
+
+
+def with_summary(schema):
+    """`schema` plus a leading "summary" field for the prose answer."""
+    model = _with_summary_models.get(schema)
+    if model is None:
+        model = _with_summary_models[schema] = create_model(
+            f"{schema.__name__}Answer",
+            __base__=schema,
+            summary=(str, Field(description="Natural language answer to the question")),
+        )
+    return model
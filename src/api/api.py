@@ -1,19 +1,32 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+import asyncio
 import json
 import os
+import threading
+import time
 
-from api.cache import cache_key, cache_get, cache_set
+from api.cache import cache_key, cache_get, cache_set, acache_get, acache_set, cache_stats
+from api.singleflight import SingleFlight
+from api.request_log import request_log
+from api.semantic_cache import canonical_ids, canonical_topics, semantic_index, token_set
 
 # ✅ load .env
 load_dotenv()
 
-from services.candidate_service import list_candidates, get_candidate_by_id
-from services.job_service import list_jobs, get_job_by_id
-from services.course_service import list_courses, get_course_by_id
+from services.candidate_service import iter_candidates, get_candidate_by_id
+from services.job_service import iter_jobs, get_job_by_id
+from services.course_service import iter_courses, get_course_by_id
+from services.data_versions import adependency_versions, dependency_versions
+from services.tracing import current_trace, record, escape_label, render_metrics, server_timing, span
+from services.skill_gap_engine import compute_skill_gaps
+from services.match_engine import top_candidates_for_jobs
 
+from agents.base_agent import event_sink
 from agents.candidate_agent import CandidateAgent
 from agents.job_agent import JobAgent
 from agents.course_agent import CourseAgent
@@ -23,7 +36,7 @@ from agents.course_agent import CourseAgent
 # -------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(BASE_DIR, "..", ".."))
-DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+DATA_DIR = os.getenv("AGENT_DATA_DIR", os.path.join(PROJECT_ROOT, "data"))
 
 CANDIDATES_FILE = os.path.join(DATA_DIR, "candidates.json")
 JOBS_FILE = os.path.join(DATA_DIR, "jobs.json")
@@ -31,6 +44,155 @@ COURSES_FILE = os.path.join(DATA_DIR, "courses.json")
 
 app = FastAPI()
 
+# -------------------
+# Shared agents
+# -------------------
+_agents = {}
+_agents_lock = threading.Lock()
+
+def get_agent(agent_cls):
+    """
+    Return the process-wide instance of agent_cls, building it on first use.
+    Agents are stateless between queries, so one instance serves every request.
+    """
+    agent = _agents.get(agent_cls)
+    if agent is None:
+        with _agents_lock:
+            agent = _agents.get(agent_cls)
+            if agent is None:
+                with span("agent_init", agent=agent_cls.__name__):
+                    agent = _agents[agent_cls] = agent_cls()
+    return agent
+
+# -------------------
+# Cache + single-flight
+# -------------------
+# Concurrent requests for the same cold key share one computation instead
+# of each launching its own agent run.
+flights = SingleFlight()
+
+async def _cached(key: str, compute):
+    """Return the cached result for key, or await compute() once for all concurrent callers."""
+    cached = await acache_get(key)
+    if cached:
+        return cached
+
+    async def fill():
+        cached = await acache_get(key)  # a flight that just finished may have filled it
+        if cached:
+            return cached
+        result = await compute()
+        await acache_set(key, result)
+        return result
+
+    return await flights.ado(key, fill)
+
+def _cached_sync(key: str, compute):
+    """Sync twin of _cached() for threadpool handlers."""
+    cached = cache_get(key)
+    if cached:
+        return cached
+
+    def fill():
+        cached = cache_get(key)
+        if cached:
+            return cached
+        result = compute()
+        cache_set(key, result)
+        return result
+
+    return flights.do(key, fill)
+
+# -------------------
+# Streaming
+# -------------------
+# ?stream=sse or ?stream=ndjson on an agent endpoint returns its progress as
+# it happens: "step" (tool call), "observation" (tool result) and "token"
+# (LLM output) events, then a "result" event with the usual response body,
+# or an "error" event. The result is cached exactly as without streaming.
+StreamFormat = Literal["sse", "ndjson"]
+STREAM_QUERY = Query(None, description="Stream progress events as 'sse' or 'ndjson'")
+
+async def _respond(key: str, compute, stream: Optional[str] = None, similar=None):
+    """
+    Serve key from the cache or compute(), as JSON or as an event stream.
+    similar=(scope, tokens) enables near-duplicate reuse: on an exact miss, a
+    cached result for a similar input in the same scope is returned instead,
+    and a freshly computed result is registered for later lookups.
+    """
+    if similar is not None and semantic_index.enabled:
+        key, compute = await _similar(key, compute, *similar)
+    if stream is None:
+        return await _cached(key, compute)
+    media_type = "text/event-stream" if stream == "sse" else "application/x-ndjson"
+    return StreamingResponse(_encoded(_event_stream(key, compute), stream), media_type=media_type)
+
+async def _similar(key: str, compute, scope: str, tokens):
+    if await acache_get(key):
+        return key, compute
+    near = semantic_index.lookup(scope, tokens)
+    if near is not None:
+        if await acache_get(near):
+            return near, compute
+        semantic_index.discard(scope, near)  # evicted from the cache since
+
+    async def compute_and_register():
+        result = await compute()
+        semantic_index.add(scope, tokens, key)
+        return result
+    return key, compute_and_register
+
+async def _event_stream(key: str, compute):
+    cached = await acache_get(key)
+    if cached:
+        yield {"event": "result", "cached": True, "data": cached}
+        return
+
+    queue = asyncio.Queue()
+    token = event_sink.set(queue.put_nowait)
+    try:
+        # The task copies the current context, so the agent sees the sink.
+        # If the client disconnects it still runs to the end and fills the cache.
+        run = asyncio.ensure_future(_cached(key, compute))
+    finally:
+        event_sink.reset(token)
+
+    while True:
+        get = asyncio.ensure_future(queue.get())
+        done, _ = await asyncio.wait({get, run}, return_when=asyncio.FIRST_COMPLETED)
+        if get not in done:
+            get.cancel()
+            break
+        yield get.result()
+    while not queue.empty():
+        yield queue.get_nowait()
+
+    try:
+        yield {"event": "result", "cached": False, "data": run.result()}
+    except Exception as e:
+        yield {"event": "error", "detail": str(e)}
+
+async def _encoded(events, stream: str):
+    async for event in events:
+        data = json.dumps(event)
+        yield f"event: {event['event']}\ndata: {data}\n\n" if stream == "sse" else data + "\n"
+
+# -------------------
+# Batch limits
+# -------------------
+# LLM calls a batch endpoint keeps in flight at once (shared by all batches),
+# so one large batch cannot exhaust the provider rate limit or the HTTP pool.
+BATCH_LLM_CONCURRENCY = int(os.getenv("AGENT_BATCH_CONCURRENCY", 8))
+BATCH_MAX_ITEMS = 500
+_batch_slots = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+def _bounded(compute):
+    """Wrap an async compute() so it waits for a batch LLM slot."""
+    async def run():
+        async with _batch_slots:
+            return await compute()
+    return run
+
 # ✅ Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -40,242 +202,393 @@ app.add_middleware(
     allow_headers=["*"],   # allow all headers
 )
 
+# ✅ Per-request timing: every span recorded while serving the request
+# (agent runs, LLM and tool calls, SQLite cache) is summed per name into a
+# Server-Timing header. Streaming responses only cover the time until headers.
+@app.middleware("http")
+async def server_timing_header(request: Request, call_next):
+    trace = []
+    token = current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_trace.reset(token)
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    record("http", elapsed, route=route.path if route else "unmatched")
+    if route is not None and request.path_params:
+        await request_log.arecord(route.path, request.path_params)  # warm-up priorities
+    response.headers["Server-Timing"] = server_timing(trace + [("total", elapsed)])
+    return response
+
 @app.get("/")
 def root():
     return {"message": "Agent API is running"}
 
+@app.get("/cache/stats")
+def get_cache_stats():
+    return cache_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text format: span durations, LLM calls/tokens and cache tier stats."""
+    lines = []
+    tiers = cache_stats()  # one pass over the SQLite table per scrape
+    for stat, kind in (("entries", "gauge"), ("bytes", "gauge"), ("hits", "counter"), ("misses", "counter")):
+        name = f"agent_cache_{stat}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {name} {kind}")
+        for tier, stats in tiers.items():
+            lines.append(f'{name}{{tier="{escape_label(tier)}"}} {stats[stat]}')
+    return PlainTextResponse(render_metrics(lines), media_type="text/plain; version=0.0.4")
+
 # ======================================================
 # CandidateAgent endpoints
 # ======================================================
 
 @app.get("/candidate/{candidate_id}/job/{job_id}/skill-gap")
-def skill_gap(candidate_id: int, job_id: int):
-    key = cache_key("skill_gap", {"candidate_id": candidate_id, "job_id": job_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CandidateAgent()
-    result = agent.getSkillGap(candidate_id, job_id)
-    cache_set(key, result)
-    return result
+async def skill_gap(
+    candidate_id: int,
+    job_id: int,
+    explain: bool = Query(True, description="Ask the LLM for a narrative explanation of the gaps"),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
+):
+    key = await asyncio.to_thread(_skill_gap_key, candidate_id, job_id, explain)
+    return await _respond(key, lambda: get_agent(CandidateAgent).agetSkillGap(candidate_id, job_id, explain=explain), stream)
+
+def _skill_gap_key(candidate_id: int, job_id: int, explain: bool) -> str:
+    return cache_key(
+        "skill_gap",
+        {"candidate_id": candidate_id, "job_id": job_id, "explain": explain},
+        dependency_versions(f"candidate:{candidate_id}", f"job:{job_id}", "courses"),
+    )
 
 @app.get("/candidate/{candidate_id}/career-path/{desired_job_id}")
-def candidate_career_path(candidate_id: int, desired_job_id: int):
-    key = cache_key("career_path", {"candidate_id": candidate_id, "desired_job_id": desired_job_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CandidateAgent()
-    result = agent.getCareerPath(candidate_id, desired_job_id)
-    cache_set(key, result)
-    return result
+async def candidate_career_path(
+    candidate_id: int,
+    desired_job_id: int,
+    explain: bool = Query(True, description="Ask the LLM to narrate the planned milestones"),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
+):
+    # Prerequisites are mined from every candidate, so the plan depends on all of them.
+    key = cache_key(
+        "career_plan",
+        {"candidate_id": candidate_id, "desired_job_id": desired_job_id, "explain": explain},
+        await adependency_versions("candidates", f"job:{desired_job_id}", "courses"),
+    )
+    return await _respond(
+        key, lambda: get_agent(CandidateAgent).agetCareerPath(candidate_id, desired_job_id, explain=explain), stream
+    )
 
 @app.get("/candidate/{candidate_id}/skills-report")
-def candidate_skills_report(candidate_id: int):
-    key = cache_key("skills_report", {"candidate_id": candidate_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CandidateAgent()
-    result = agent.getSkillsReport(candidate_id)
-    cache_set(key, result)
-    return result
+async def candidate_skills_report(candidate_id: int, stream: Optional[StreamFormat] = STREAM_QUERY):
+    key = await asyncio.to_thread(_skills_report_key, candidate_id)
+    return await _respond(key, lambda: get_agent(CandidateAgent).agetSkillsReport(candidate_id), stream)
+
+def _skills_report_key(candidate_id: int) -> str:
+    return cache_key(
+        "skills_report",
+        {"candidate_id": candidate_id},
+        dependency_versions(f"candidate:{candidate_id}"),
+    )
 
 @app.get("/candidate/{candidate_id}/relevant-jobs")
-def candidate_relevant_jobs(candidate_id: int):
-    key = cache_key("relevant_jobs", {"candidate_id": candidate_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CandidateAgent()
-    result = agent.getRelevantJobsForCandidate(candidate_id)
-    cache_set(key, result)
-    return result
+async def candidate_relevant_jobs(candidate_id: int, stream: Optional[StreamFormat] = STREAM_QUERY):
+    key = await asyncio.to_thread(_relevant_jobs_key, candidate_id)
+    return await _respond(key, lambda: get_agent(CandidateAgent).agetRelevantJobsForCandidate(candidate_id), stream)
+
+def _relevant_jobs_key(candidate_id: int) -> str:
+    return cache_key(
+        "relevant_jobs",
+        {"candidate_id": candidate_id},
+        dependency_versions(f"candidate:{candidate_id}", "jobs"),
+    )
 
 # ======================================================
 # JobAgent endpoints
 # ======================================================
 
 @app.get("/job/{job_id}/matching-candidates")
-def job_matching_candidates(job_id: int):
-    key = cache_key("matching_candidates", {"job_id": job_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = JobAgent()
-    result = agent.getMatchingCandidates(job_id)
-    cache_set(key, result)
-    return result
+async def job_matching_candidates(
+    job_id: int,
+    top_k: int = Query(10, ge=1, description="Number of candidates to return"),
+    explain: bool = Query(True, description="Ask the LLM for a narrative explanation of the ranking"),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
+):
+    key = await asyncio.to_thread(_matching_candidates_key, job_id, top_k, explain)
+    return await _respond(key, lambda: get_agent(JobAgent).agetMatchingCandidates(job_id, top_k=top_k, explain=explain), stream)
+
+def _matching_candidates_key(job_id: int, top_k: int, explain: bool) -> str:
+    return cache_key(
+        "matching_candidates",
+        {"job_id": job_id, "top_k": top_k, "explain": explain},
+        dependency_versions(f"job:{job_id}", "candidates"),
+    )
 
 @app.get("/job/{job_id}/candidate/{candidate_id}/skills-report")
-def job_candidate_skills_report(candidate_id: int, job_id: int):
-    key = cache_key("job_candidate_skills_report", {"candidate_id": candidate_id, "job_id": job_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = JobAgent()
-    result = agent.getSkillsReportAndJobReadiness(candidate_id, job_id)
-    cache_set(key, result)
-    return result
+async def job_candidate_skills_report(candidate_id: int, job_id: int, stream: Optional[StreamFormat] = STREAM_QUERY):
+    key = cache_key(
+        "job_candidate_skills_report",
+        {"candidate_id": candidate_id, "job_id": job_id},
+        await adependency_versions(f"candidate:{candidate_id}", f"job:{job_id}", "courses"),
+    )
+    return await _respond(key, lambda: get_agent(JobAgent).agetSkillsReportAndJobReadiness(candidate_id, job_id), stream)
 
 @app.get("/job/{job_id}/explain-ranking")
-def job_explain_ranking(job_id: int):
-    key = cache_key("explain_ranking", {"job_id": job_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = JobAgent()
-    result = agent.explainCandidateRanking(job_id)
-    cache_set(key, result)
-    return result
+async def job_explain_ranking(
+    job_id: int,
+    top_k: int = Query(10, ge=1, description="Number of candidates to return"),
+    explain: bool = Query(True, description="Ask the LLM for a narrative explanation of the ranking"),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
+):
+    key = cache_key(
+        "explain_ranking",
+        {"job_id": job_id, "top_k": top_k, "explain": explain},
+        await adependency_versions(f"job:{job_id}", "candidates"),
+    )
+    return await _respond(key, lambda: get_agent(JobAgent).aexplainCandidateRanking(job_id, top_k=top_k, explain=explain), stream)
 
 # ======================================================
 # CourseAgent endpoints
 # ======================================================
 
 @app.get("/courses/recommendations/candidate/{candidate_id}/job/{job_id}")
-def course_recommendations(candidate_id: int, job_id: int):
-    key = cache_key("course_recommendations", {"candidate_id": candidate_id, "job_id": job_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CourseAgent()
-    result = agent.getCoursesForSkillGap(candidate_id, job_id)
-    cache_set(key, result)
-    return result
+async def course_recommendations(
+    candidate_id: int,
+    job_id: int,
+    explain: bool = Query(True, description="Ask the LLM to justify the chosen courses"),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
+):
+    key = cache_key(
+        "course_bundle",
+        {"candidate_id": candidate_id, "job_id": job_id, "explain": explain},
+        await adependency_versions(f"candidate:{candidate_id}", f"job:{job_id}", "courses"),
+    )
+    return await _respond(key, lambda: get_agent(CourseAgent).agetCoursesForSkillGap(candidate_id, job_id, explain=explain), stream)
 
 @app.get("/courses/analyze-coverage")
-def analyze_course_coverage(
+async def analyze_course_coverage(
     course_ids: List[int] = Query(..., description="List of course IDs"),
     target_topics: List[str] = Query(..., description="List of target topics"),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
 ):
-    key = cache_key("analyze_coverage", {"course_ids": course_ids, "target_topics": target_topics})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CourseAgent()
-    result = agent.analyzeCourseCoverage(course_ids, target_topics)
-    cache_set(key, result)
-    return result
+    # Order, duplicates and topic spelling don't change the answer, so they don't change the key.
+    versions = await adependency_versions(*(f"course:{course_id}" for course_id in canonical_ids(course_ids)))
+    key = cache_key(
+        "analyze_coverage",
+        {"course_ids": canonical_ids(course_ids), "target_topics": canonical_topics(target_topics)},
+        versions,
+    )
+    scope = cache_key("analyze_coverage_scope", {"course_ids": canonical_ids(course_ids)}, versions)
+    return await _respond(
+        key,
+        lambda: get_agent(CourseAgent).aanalyzeCourseCoverage(course_ids, target_topics),
+        stream,
+        similar=(scope, token_set(target_topics)),
+    )
 
 @app.get("/courses/suggest-new")
-def suggest_new_courses(
+async def suggest_new_courses(
     missing_topics: List[str] = Query(..., description="List of missing topics"),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
 ):
-    key = cache_key("suggest_new_courses", {"missing_topics": missing_topics})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CourseAgent()
-    result = agent.suggestNewCourses(missing_topics)
-    cache_set(key, result)
-    return result
+    versions = await adependency_versions("courses")
+    key = cache_key("suggest_new_courses", {"missing_topics": canonical_topics(missing_topics)}, versions)
+    scope = cache_key("suggest_new_courses_scope", {}, versions)
+    return await _respond(
+        key,
+        lambda: get_agent(CourseAgent).asuggestNewCourses(missing_topics),
+        stream,
+        similar=(scope, token_set(missing_topics)),
+    )
 
 # ======================================================
 # New CourseAgent endpoints
 # ======================================================
 
 @app.get("/course/{course_id}/improvement-suggestions")
-def course_improvement_suggestions(course_id: int):
-    key = cache_key("course_improvement_suggestions", {"course_id": course_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CourseAgent()
-    result = agent.getCourseImprovementSuggestions(course_id)
-    cache_set(key, result)
-    return result
+async def course_improvement_suggestions(course_id: int, stream: Optional[StreamFormat] = STREAM_QUERY):
+    key = cache_key(
+        "course_improvement_suggestions",
+        {"course_id": course_id},
+        await adependency_versions(f"course:{course_id}", "jobs", "candidates"),
+    )
+    return await _respond(key, lambda: get_agent(CourseAgent).agetCourseImprovementSuggestions(course_id), stream)
 
 
 @app.get("/courses/most-in-demand-topics")
-def courses_most_in_demand_topics():
-    key = cache_key("courses_most_in_demand_topics", {})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CourseAgent()
-    result = agent.getMostInDemandTopics()
-    cache_set(key, result)
-    return result
+async def courses_most_in_demand_topics(
+    explain: bool = Query(True, description="Ask the LLM to narrate the demand figures"),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
+):
+    key = cache_key(
+        "courses_most_in_demand_topics",
+        {"explain": explain},
+        await adependency_versions("jobs"),
+    )
+    return await _respond(key, lambda: get_agent(CourseAgent).agetMostInDemandTopics(explain=explain), stream)
 
 
 @app.get("/course/{course_id}/market-fit")
-def course_market_fit(course_id: int):
-    key = cache_key("course_market_fit", {"course_id": course_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CourseAgent()
-    result = agent.getCourseMarketFit(course_id)
-    cache_set(key, result)
-    return result
+async def course_market_fit(course_id: int, stream: Optional[StreamFormat] = STREAM_QUERY):
+    key = await asyncio.to_thread(_market_fit_key, course_id)
+    return await _respond(key, lambda: get_agent(CourseAgent).agetCourseMarketFit(course_id), stream)
+
+def _market_fit_key(course_id: int) -> str:
+    return cache_key(
+        "course_market_fit",
+        {"course_id": course_id},
+        dependency_versions(f"course:{course_id}", "jobs", "candidates"),
+    )
 
 
 @app.get("/course/{course_id}/competitor-analysis")
-def course_competitor_analysis(course_id: int):
-    key = cache_key("course_competitor_analysis", {"course_id": course_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CourseAgent()
-    result = agent.getCourseCompetitorAnalysis(course_id)
-    cache_set(key, result)
-    return result
+async def course_competitor_analysis(course_id: int, stream: Optional[StreamFormat] = STREAM_QUERY):
+    key = cache_key(
+        "course_competitor_analysis",
+        {"course_id": course_id},
+        await adependency_versions("courses"),
+    )
+    return await _respond(key, lambda: get_agent(CourseAgent).agetCourseCompetitorAnalysis(course_id), stream)
 
 
 @app.get("/courses/emerging-topics")
-def courses_emerging_topics():
-    key = cache_key("courses_emerging_topics", {})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    agent = CourseAgent()
-    result = agent.getEmergingTopicsForCourses()
-    cache_set(key, result)
-    return result
+async def courses_emerging_topics(
+    explain: bool = Query(True, description="Ask the LLM to narrate the coverage gaps"),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
+):
+    key = cache_key(
+        "courses_emerging_topics",
+        {"explain": explain},
+        await adependency_versions("jobs", "courses"),
+    )
+    return await _respond(key, lambda: get_agent(CourseAgent).agetEmergingTopicsForCourses(explain=explain), stream)
+
+# ======================================================
+# Batch endpoints
+# ======================================================
+# Each item shares its cache entry with the matching single endpoint. Cached
+# items are answered directly, the numbers for the rest are computed in one
+# vectorized pass, and their LLM narrations run with bounded concurrency.
+
+class CandidateJobPair(BaseModel):
+    candidate_id: int
+    job_id: int
+
+class SkillGapBatchRequest(BaseModel):
+    pairs: List[CandidateJobPair] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    explain: bool = True
+
+class MatchingCandidatesBatchRequest(BaseModel):
+    job_ids: List[int] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    top_k: int = Field(10, ge=1)
+    explain: bool = True
+
+@app.post("/batch/skill-gaps")
+async def batch_skill_gaps(request: SkillGapBatchRequest):
+    pairs = list(dict.fromkeys((p.candidate_id, p.job_id) for p in request.pairs))
+    keys = await asyncio.to_thread(lambda: {pair: _skill_gap_key(*pair, request.explain) for pair in pairs})
+    hits = await asyncio.gather(*(acache_get(keys[pair]) for pair in pairs))
+    results = {pair: hit for pair, hit in zip(pairs, hits) if hit}
+
+    missing = [pair for pair in pairs if pair not in results]
+    agent = get_agent(CandidateAgent)
+    computed = await asyncio.gather(*(
+        _cached(keys[pair], _bounded(
+            lambda pair=pair, gap=gap: agent.agetSkillGap(*pair, explain=request.explain, gap=gap)
+        ))
+        for pair, gap in zip(missing, await asyncio.to_thread(compute_skill_gaps, missing))
+    ))
+    results.update(zip(missing, computed))
+    return {"results": [results[(p.candidate_id, p.job_id)] for p in request.pairs]}
+
+@app.post("/batch/matching-candidates")
+async def batch_matching_candidates(request: MatchingCandidatesBatchRequest):
+    job_ids = list(dict.fromkeys(request.job_ids))
+    keys = await asyncio.to_thread(
+        lambda: {job_id: _matching_candidates_key(job_id, request.top_k, request.explain) for job_id in job_ids}
+    )
+    hits = await asyncio.gather(*(acache_get(keys[job_id]) for job_id in job_ids))
+    results = {job_id: hit for job_id, hit in zip(job_ids, hits) if hit}
+
+    missing = [job_id for job_id in job_ids if job_id not in results]
+    agent = get_agent(JobAgent)
+    computed = await asyncio.gather(*(
+        _cached(keys[job_id], _bounded(
+            lambda job_id=job_id, ranked=ranked: agent.agetMatchingCandidates(
+                job_id, top_k=request.top_k, explain=request.explain, ranked=ranked
+            )
+        ))
+        for job_id, ranked in zip(missing, await asyncio.to_thread(top_candidates_for_jobs, missing, k=request.top_k))
+    ))
+    results.update(zip(missing, computed))
+    return {"results": [results[job_id] for job_id in request.job_ids]}
 
 # ======================================================
 # NEW: direct JSON data endpoints (no cache)
 # ======================================================
 
+# Bytes of encoded records sent per chunk by the list endpoints.
+LIST_CHUNK_SIZE = 1 << 16
+ListFormat = Literal["json", "ndjson"]
+LIST_FORMAT_QUERY = Query("json", description="'json' for one array, 'ndjson' for one record per line")
+
+def _encoded_records(records, fmt: str):
+    """Encode records as they are read: a JSON array or NDJSON, in chunks of about LIST_CHUNK_SIZE."""
+    parts, size = ["[" if fmt == "json" else ""], 0
+    for i, record in enumerate(records):
+        data = json.dumps(record)
+        parts.append(data + "\n" if fmt == "ndjson" else ("," if i else "") + data)
+        size += len(data)
+        if size >= LIST_CHUNK_SIZE:
+            yield "".join(parts)
+            parts, size = [], 0
+    if fmt == "json":
+        parts.append("]")
+    yield "".join(parts)
+
+def _record_list(records, fmt: str):
+    """Stream a whole data file: memory stays flat however many records it holds."""
+    if isinstance(records, dict):
+        return records  # error
+    media_type = "application/json" if fmt == "json" else "application/x-ndjson"
+    return StreamingResponse(_encoded_records(records, fmt), media_type=media_type)
+
 @app.get("/candidates")
-def get_all_candidates():
-    return list_candidates()
+def get_all_candidates(format: ListFormat = LIST_FORMAT_QUERY):
+    return _record_list(iter_candidates(), format)
 
 @app.get("/jobs")
-def get_all_jobs():
-    return list_jobs()
+def get_all_jobs(format: ListFormat = LIST_FORMAT_QUERY):
+    return _record_list(iter_jobs(), format)
 
 @app.get("/courses")
-def get_all_courses():
-    return list_courses()
+def get_all_courses(format: ListFormat = LIST_FORMAT_QUERY):
+    return _record_list(iter_courses(), format)
 
 @app.get("/candidates/{candidate_id}")
 def get_candidate(candidate_id: int):
-    key = cache_key("get_candidate", {"candidate_id": candidate_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    result = get_candidate_by_id(candidate_id)
-    cache_set(key, result)
-    return result
+    key = cache_key(
+        "get_candidate",
+        {"candidate_id": candidate_id},
+        dependency_versions(f"candidate:{candidate_id}"),
+    )
+    return _cached_sync(key, lambda: get_candidate_by_id(candidate_id))
 
 @app.get("/courses/{course_id}")
 def get_course(course_id: int):
-    key = cache_key("get_course", {"course_id": course_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    result = get_course_by_id(course_id)
-    cache_set(key, result)
-    return result
+    key = cache_key(
+        "get_course",
+        {"course_id": course_id},
+        dependency_versions(f"course:{course_id}"),
+    )
+    return _cached_sync(key, lambda: get_course_by_id(course_id))
 
 @app.get("/jobs/{job_id}")
 def get_job(job_id: int):
-    key = cache_key("get_job", {"job_id": job_id})
-    cached = cache_get(key)
-    if cached:
-        return cached
-    result = get_job_by_id(job_id)
-    cache_set(key, result)
-    return result
\ No newline at end of file
+    key = cache_key(
+        "get_job",
+        {"job_id": job_id},
+        dependency_versions(f"job:{job_id}"),
+    )
+    return _cached_sync(key, lambda: get_job_by_id(job_id))
\ No newline at end of file
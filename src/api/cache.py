@@ -1,36 +1,279 @@
+import asyncio
 import sqlite3
 import os
 import json
 import hashlib
+import threading
+import time
+from collections import OrderedDict
 
-DB_FILE = os.path.join(os.path.dirname(__file__), "cache.db")
+from services.tracing import traced
+
+DB_FILE = os.getenv("AGENT_CACHE_DB", os.path.join(os.path.dirname(__file__), "cache.db"))
+
+# Entry lifetime in seconds (0 = never expire) and bounds enforced by LRU eviction.
+DEFAULT_TTL = int(os.getenv("AGENT_CACHE_TTL", 7 * 24 * 3600))
+MAX_ENTRIES = int(os.getenv("AGENT_CACHE_MAX_ENTRIES", 50_000))
+MAX_BYTES = int(os.getenv("AGENT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# In-process LRU tier in front of SQLite.
+MEMORY_MAX_ENTRIES = int(os.getenv("AGENT_MEMORY_CACHE_ENTRIES", 2048))
+MEMORY_MAX_BYTES = int(os.getenv("AGENT_MEMORY_CACHE_BYTES", 64 * 1024 * 1024))
+
+# last_access is only rewritten when older than this, so most hits stay read-only.
+TOUCH_INTERVAL = 60
+# Bounds are checked every N writes rather than on each one.
+EVICT_EVERY = 100
+
+
+class SQLiteCache:
+    """
+    JSON value cache on SQLite.
+
+    Each thread keeps one open connection (WAL mode, so readers never block
+    on a writer). The schema is created/migrated once per process. Entries
+    carry created/last-access/expiry timestamps and their size; expired
+    entries are dropped on read, and the least recently used ones are
+    evicted when the table exceeds max_entries or max_bytes.
+    """
+
+    def __init__(self, path: str = DB_FILE, ttl: int = DEFAULT_TTL,
+                 max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        # Counters are bumped from request threads, the event loop and warm-up workers.
+        self._counter_lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, hit: bool):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._ensure_schema(conn)
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self, conn):
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)")
+            # Older cache.db files only have (key, value): add the bookkeeping columns.
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+            for name, sql_type in (("created_at", "REAL"), ("last_access", "REAL"),
+                                   ("expires_at", "REAL"), ("size", "INTEGER")):
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE cache ADD COLUMN {name} {sql_type}")
+            now = time.time()
+            conn.execute(
+                "UPDATE cache SET created_at=?, last_access=?, size=length(value) WHERE created_at IS NULL",
+                (now, now),
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)")
+            conn.commit()
+            self._schema_ready = True
+            self._evict(conn)
+
+    def get(self, key: str):
+        entry = self.lookup(key)
+        return None if entry is None else entry[0]
+
+    @traced("cache", tier="sqlite", op="get")
+    def lookup(self, key: str):
+        """Return (value, size, expires_at) for a live entry, or None."""
+        conn = self.connection()
+        row = conn.execute(
+            "SELECT value, expires_at, last_access FROM cache WHERE key=?", (key,)
+        ).fetchone()
+        if row is None:
+            self._count(hit=False)
+            return None
+
+        value, expires_at, last_access = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            conn.execute("DELETE FROM cache WHERE key=?", (key,))
+            conn.commit()
+            self._count(hit=False)
+            return None
+        if last_access is None or now - last_access >= TOUCH_INTERVAL:
+            conn.execute("UPDATE cache SET last_access=? WHERE key=?", (now, key))
+            conn.commit()
+        self._count(hit=True)
+        return json.loads(value), len(value), expires_at
+
+    @traced("cache", tier="sqlite", op="set")
+    def set(self, key: str, value, ttl: int = None):
+        """Store value; returns (size, expires_at) of the new entry."""
+        ttl = self.ttl if ttl is None else ttl
+        data = json.dumps(value)
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        conn = self.connection()
+        conn.execute(
+            "REPLACE INTO cache (key, value, created_at, last_access, expires_at, size) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, data, now, now, expires_at, len(data)),
+        )
+        conn.commit()
+
+        with self._counter_lock:
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY == 0
+        if evict:
+            self._evict(conn)
+        return len(data), expires_at
+
+    def delete(self, key: str):
+        conn = self.connection()
+        conn.execute("DELETE FROM cache WHERE key=?", (key,))
+        conn.commit()
+
+    @traced("cache", tier="sqlite", op="evict")
+    def _evict(self, conn):
+        """Drop expired entries, then least recently used ones until within bounds."""
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            # Over the byte bound, drop a tenth of the table per round.
+            batch = max(count - self.max_entries, count // 10, 1)
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access LIMIT ?)",
+                (batch,),
+            )
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        conn.commit()
+
+    def stats(self):
+        count, total = self.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+
+class MemoryLRU:
+    """
+    Bounded in-process LRU of decoded values, sized by their JSON length.
+    Values are shared with callers, which must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = MEMORY_MAX_ENTRIES, max_bytes: int = MEMORY_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            if item[2] is not None and item[2] <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: str, value, size: int, expires_at: float = None):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return {"entries": len(self._data), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+cache = SQLiteCache()
+memory = MemoryLRU()
 
 def get_connection():
-    # allow use across threads
-    return sqlite3.connect(DB_FILE, check_same_thread=False)
+    # one pooled connection per thread
+    return cache.connection()
 
-def cache_key(prefix: str, params: dict) -> str:
+def cache_key(prefix: str, params: dict, versions: dict = None) -> str:
     """
     Generate a stable cache key based on prefix + params.
+    `versions` (see services.data_versions.dependency_versions) folds the
+    fingerprints of the data the result depends on into the key, so entries
+    built from since-changed records are simply never looked up again and
+    age out through TTL/LRU eviction.
     """
+    if versions:
+        params = {"params": params, "versions": versions}
     params_str = json.dumps(params, sort_keys=True)
     key_hash = hashlib.sha256(params_str.encode()).hexdigest()
     return f"{prefix}:{key_hash}"
 
 def cache_get(key: str):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)")
-    row = cur.execute("SELECT value FROM cache WHERE key=?", (key,)).fetchone()
-    conn.close()
-    if row:
-        return json.loads(row[0])
-    return None
-
-def cache_set(key: str, value: dict):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)")
-    cur.execute("REPLACE INTO cache (key, value) VALUES (?, ?)", (key, json.dumps(value)))
-    conn.commit()
-    conn.close()
+    """Two-tier read: in-process LRU first, then SQLite (read-through into the LRU)."""
+    value = memory.get(key)
+    if value is not None:
+        return value
+    return _sqlite_get(key)
+
+def _sqlite_get(key: str):
+    entry = cache.lookup(key)
+    if entry is None:
+        return None
+    value, size, expires_at = entry
+    memory.set(key, value, size, expires_at)
+    return value
+
+def cache_set(key: str, value: dict, ttl: int = None):
+    """Write-through to both tiers."""
+    size, expires_at = cache.set(key, value, ttl=ttl)
+    memory.set(key, value, size, expires_at)
+
+def cache_stats():
+    return {"memory": memory.stats(), "sqlite": cache.stats()}
+
+# Async variants: memory hits are answered inline; SQLite calls run in a
+# worker thread so they never block the event loop.
+async def acache_get(key: str):
+    value = memory.get(key)
+    if value is not None:
+        return value
+    return await asyncio.to_thread(_sqlite_get, key)
+
+async def acache_set(key: str, value: dict, ttl: int = None):
+    await asyncio.to_thread(cache_set, key, value, ttl)
@@ -0,0 +1,87 @@
+import asyncio
+import atexit
+import json
+import threading
+import time
+from collections import Counter
+
+from api.cache import cache
+
+# Pending counts are written out after this many requests or seconds.
+FLUSH_EVERY = 100
+FLUSH_INTERVAL = 10.0
+
+
+class RequestLog:
+    """
+    How often each (route, path parameters) combination is requested,
+    persisted next to the cache so the warm-up job can serve the most
+    requested keys first. Counts are buffered in memory and added to the
+    SQLite table in batches.
+    """
+
+    def __init__(self, db=cache):
+        self.db = db
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+        self._schema_ready = False
+        self._flush_task = None
+
+    def _conn(self):
+        conn = self.db.connection()
+        if not self._schema_ready:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS request_counts "
+                "(route TEXT, params TEXT, count INTEGER, last_seen REAL, PRIMARY KEY (route, params))"
+            )
+            conn.commit()
+            self._schema_ready = True
+        return conn
+
+    def _add(self, route: str, params: dict) -> bool:
+        """Count one request in memory. Returns: whether a flush is due."""
+        with self._lock:
+            self._pending[(route, json.dumps(params, sort_keys=True))] += 1
+            self._pending_total += 1
+            return self._pending_total >= FLUSH_EVERY or time.monotonic() - self._last_flush >= FLUSH_INTERVAL
+
+    def record(self, route: str, params: dict):
+        if self._add(route, params):
+            self.flush()
+
+    async def arecord(self, route: str, params: dict):
+        """
+        record() for code on the event loop: a due flush runs in a worker
+        thread in the background (one at a time), so no request waits on
+        the SQLite write.
+        """
+        if self._add(route, params) and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.flush))
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._pending_total = 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        now = time.time()
+        conn = self._conn()
+        conn.executemany(
+            "INSERT INTO request_counts (route, params, count, last_seen) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (route, params) DO UPDATE SET count = count + excluded.count, last_seen = excluded.last_seen",
+            [(route, params, count, now) for (route, params), count in pending.items()],
+        )
+        conn.commit()
+
+    def counts(self) -> dict:
+        """{(route, params_json): count} for everything recorded so far."""
+        self.flush()
+        rows = self._conn().execute("SELECT route, params, count FROM request_counts").fetchall()
+        return {(route, params): count for route, params, count in rows}
+
+
+request_log = RequestLog()
+atexit.register(request_log.flush)
@@ -0,0 +1,93 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from services.topic_index import normalize_topic
+
+# Minimum token-set (Jaccard) similarity for reusing a cached result computed
+# for different but similar inputs. 0 disables similarity lookups.
+SIMILARITY_THRESHOLD = float(os.getenv("AGENT_SEMANTIC_CACHE_THRESHOLD", 0))
+# Remembered inputs per scope; the oldest are forgotten first.
+MAX_ENTRIES_PER_SCOPE = 256
+
+
+def canonical_topics(topics):
+    """Topic list as used in cache keys: normalized, deduplicated and sorted."""
+    return sorted({normalize_topic(t) for t in topics if normalize_topic(t)})
+
+
+def canonical_ids(ids):
+    return sorted(set(ids))
+
+
+def token_set(topics) -> frozenset:
+    """Words of the normalized topics: ["Deep Learning", "SQL"] -> {"deep", "learning", "sql"}."""
+    return frozenset(word for topic in topics for word in re.findall(r"\w+", normalize_topic(topic)))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SemanticIndex:
+    """
+    In-process index of the inputs behind cached results, for near-duplicate
+    lookups. Entries are grouped by scope: a hash of everything that must
+    match exactly (endpoint, fixed parameters, data versions), so a similar
+    input is only ever answered from a result built on the same data.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_entries: int = MAX_ENTRIES_PER_SCOPE):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._scopes = {}  # scope -> OrderedDict(cache key -> token set)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def add(self, scope: str, tokens: frozenset, key: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            entries = self._scopes.setdefault(scope, OrderedDict())
+            entries[key] = tokens
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def lookup(self, scope: str, tokens: frozenset):
+        """Cache key of the most similar input in scope at or above the threshold, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entries = list(self._scopes.get(scope, {}).items())
+        best_key, best_score = None, self.threshold
+        for key, other in entries:
+            score = jaccard(tokens, other)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def discard(self, scope: str, key: str):
+        with self._lock:
+            self._scopes.get(scope, {}).pop(key, None)
+
+
+semantic_index = SemanticIndex()
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    print(canonical_topics(["SQL", " probability", "Probability", "sql"]))
+    index = SemanticIndex(threshold=0.6)
+    index.add("scope", token_set(["Deep Learning", "SQL", "Probability"]), "key-1")
+    print(index.lookup("scope", token_set(["probability", "deep learning", "sql", "statistics"])))
+    print(index.lookup("scope", token_set(["Transformers"])))
+    print(index.lookup("other-scope", token_set(["Deep Learning", "SQL", "Probability"])))
@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+import api.api as api
+from api.cache import acache_get
+from api.request_log import request_log
+from agents.candidate_agent import CandidateAgent
+from agents.course_agent import CourseAgent
+from agents.job_agent import JobAgent
+from services.candidate_service import candidate_store
+from services.course_service import course_store
+from services.job_service import job_store
+from services.match_engine import top_candidates_for_jobs
+
+KINDS = ("skills-report", "relevant-jobs", "matching-candidates", "skill-gap", "market-fit")
+
+
+@dataclass
+class WarmupItem:
+    """One endpoint result to precompute, under the same key the endpoint uses."""
+    route: str
+    params: Dict[str, Any]
+    key: Callable[[], str]
+    compute: Callable[[], Any]
+
+    def priority_key(self):
+        return self.route, json.dumps({k: str(v) for k, v in self.params.items()}, sort_keys=True)
+
+
+def enumerate_items(kinds=KINDS, top_n: int = 3):
+    """
+    The useful keyspace: every candidate's skills report and relevant jobs,
+    every job's matching candidates, each job's top_n candidates' skill gaps
+    and every course's market fit (endpoint defaults for optional parameters).
+    """
+    items = []
+    candidate_ids = candidate_store.ids()
+    job_ids = job_store.ids()
+
+    if "skills-report" in kinds:
+        items += [
+            WarmupItem("/candidate/{candidate_id}/skills-report", {"candidate_id": cid},
+                       lambda cid=cid: api._skills_report_key(cid),
+                       lambda cid=cid: api.get_agent(CandidateAgent).agetSkillsReport(cid))
+            for cid in candidate_ids
+        ]
+    if "relevant-jobs" in kinds:
+        items += [
+            WarmupItem("/candidate/{candidate_id}/relevant-jobs", {"candidate_id": cid},
+                       lambda cid=cid: api._relevant_jobs_key(cid),
+                       lambda cid=cid: api.get_agent(CandidateAgent).agetRelevantJobsForCandidate(cid))
+            for cid in candidate_ids
+        ]
+    if "matching-candidates" in kinds:
+        items += [
+            WarmupItem("/job/{job_id}/matching-candidates", {"job_id": jid},
+                       lambda jid=jid: api._matching_candidates_key(jid, 10, True),
+                       lambda jid=jid: api.get_agent(JobAgent).agetMatchingCandidates(jid))
+            for jid in job_ids
+        ]
+    if "skill-gap" in kinds:
+        for jid, ranked in zip(job_ids, top_candidates_for_jobs(job_ids, k=top_n)):
+            if isinstance(ranked, dict):
+                continue
+            items += [
+                WarmupItem("/candidate/{candidate_id}/job/{job_id}/skill-gap",
+                           {"candidate_id": m["candidate_id"], "job_id": jid},
+                           lambda cid=m["candidate_id"], jid=jid: api._skill_gap_key(cid, jid, True),
+                           lambda cid=m["candidate_id"], jid=jid: api.get_agent(CandidateAgent).agetSkillGap(cid, jid))
+                for m in ranked
+            ]
+    if "market-fit" in kinds:
+        items += [
+            WarmupItem("/course/{course_id}/market-fit", {"course_id": course_id},
+                       lambda course_id=course_id: api._market_fit_key(course_id),
+                       lambda course_id=course_id: api.get_agent(CourseAgent).agetCourseMarketFit(course_id))
+            for course_id in course_store.ids()
+        ]
+    return items
+
+
+def prioritize(items):
+    """Most requested first (per the request log); the rest keep enumeration order."""
+    counts = request_log.counts()
+    return sorted(items, key=lambda item: -counts.get(item.priority_key(), 0))
+
+
+class RateLimiter:
+    """Spaces out starts to at most `rate` per second (0 = unlimited)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def warm(items, concurrency: int = 4, rate: float = 0.0, progress_every: int = 100):
+    """
+    Fill the cache for every item not already in it. Resumable: results land in
+    the persistent cache as they finish, so a rerun after an interruption (or a
+    crash) skips them, while a data change yields new keys that get recomputed.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    stats = {"total": len(items), "cached": 0, "computed": 0, "failed": 0}
+    start = time.monotonic()
+
+    async def one(item):
+        async with slots:
+            key = item.key()
+            if await acache_get(key):
+                stats["cached"] += 1
+            else:
+                await limiter.wait()
+                try:
+                    await api._cached(key, item.compute)
+                    stats["computed"] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"[warmup] {item.route} {item.params} failed: {e}")
+            done = stats["cached"] + stats["computed"] + stats["failed"]
+            if progress_every and done % progress_every == 0:
+                print(f"[warmup] {done}/{stats['total']} ({time.monotonic() - start:.1f}s) {stats}")
+
+    await asyncio.gather(*(one(item) for item in items))
+    stats["seconds"] = round(time.monotonic() - start, 1)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute agent endpoint results into the cache.")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--top-n", type=int, default=3, help="Skill gaps for each job's top-N candidates")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0, help="Max agent runs started per second (0 = unlimited)")
+    parser.add_argument("--limit", type=int, help="Only the first N items after prioritisation")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be warmed")
+    args = parser.parse_args()
+
+    items = prioritize(enumerate_items(args.kinds, args.top_n))[:args.limit]
+    if args.dry_run:
+        for item in items:
+            print(item.route, item.params)
+    else:
+        print(asyncio.run(warm(items, args.concurrency, args.rate)))
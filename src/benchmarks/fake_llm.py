@@ -0,0 +1,115 @@
+import asyncio
+import json
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_WORDS = ("the candidate covers most required topics but still needs deeper practice in several "
+          "areas before the role the suggested courses close these gaps over a few months").split()
+
+
+def example_instance(schema: dict, defs: dict = None):
+    """Smallest valid instance of a JSON schema (as produced by Pydantic)."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return example_instance(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+    if "anyOf" in schema:
+        return example_instance(schema["anyOf"][0], defs)
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: example_instance(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [example_instance(schema.get("items", {}), defs)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 0.5
+    if kind == "boolean":
+        return True
+    return "text"
+
+
+class BenchmarkChatModel(BaseChatModel):
+    """
+    Deterministic offline stand-in for ChatOpenAI.
+
+    Each call sleeps `latency` seconds. Inside a ReAct run it first issues
+    `tool_calls` tool actions (on the ids in the question) and then a Final
+    Answer; when the prompt carries a JSON schema the answer is a valid
+    instance of it, otherwise `tokens` words of prose.
+    """
+
+    latency: float = 0.05
+    tokens: int = 60
+    tool_calls: int = 2
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        text = self.respond("\n".join(str(m.content) for m in messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def respond(self, prompt: str) -> str:
+        answer = self._answer(prompt)
+        if "Thought:" not in prompt or "Action Input:" not in prompt:
+            return answer
+        # ReAct prompt: one tool step per completed Observation, then the answer.
+        question = prompt.rsplit("Question:", 1)[-1]
+        step = question.count("Observation:")
+        actions = self._actions(question)
+        if step < self.tool_calls and actions:
+            tool, tool_input = actions[step % len(actions)]
+            return f"Thought: I need more data.\nAction: {tool}\nAction Input: {tool_input}"
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+    def _answer(self, prompt: str) -> str:
+        marker = prompt.rfind("matching this JSON schema")
+        if marker != -1:
+            schema, _ = json.JSONDecoder().raw_decode(prompt, prompt.index("{", marker))
+            instance = example_instance(schema)
+            instance["summary"] = self._prose()
+            return json.dumps(instance)
+        return self._prose()
+
+    def _prose(self) -> str:
+        return " ".join(_WORDS[i % len(_WORDS)] for i in range(self.tokens)) + "."
+
+    @staticmethod
+    def _actions(question: str):
+        """Tool calls a real agent would make for the question: lookups of the ids it names."""
+        actions = []
+        for kind, tool in (("candidate", "Candidate By ID"), ("job", "Job By ID"), ("course", "Course By ID")):
+            for record_id in re.findall(rf"{kind} id (\d+)", question, flags=re.IGNORECASE):
+                actions.append((tool, record_id))
+        if not actions:
+            actions.append(("Topic Frequency", "jobs 10"))
+        return actions
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    from agents.candidate_agent import CandidateAgent
+
+    agent = CandidateAgent(llm=BenchmarkChatModel(latency=0.0), verbose=True, prefetch_context=False)
+    print(agent.getSkillsReport(1))
@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fake_llm import BenchmarkChatModel
+from benchmarks.synthetic_data import SCALES, write_dataset
+
+# (name, path template). {c}, {j}, {k} are replaced by candidate, job and course ids.
+ENDPOINTS = [
+    ("skill-gap", "/candidate/{c}/job/{j}/skill-gap"),
+    ("career-path", "/candidate/{c}/career-path/{j}"),
+    ("skills-report", "/candidate/{c}/skills-report"),
+    ("relevant-jobs", "/candidate/{c}/relevant-jobs"),
+    ("matching-candidates", "/job/{j}/matching-candidates"),
+    ("job-candidate-skills-report", "/job/{j}/candidate/{c}/skills-report"),
+    ("explain-ranking", "/job/{j}/explain-ranking"),
+    ("course-recommendations", "/courses/recommendations/candidate/{c}/job/{j}"),
+    ("improvement-suggestions", "/course/{k}/improvement-suggestions"),
+    ("market-fit", "/course/{k}/market-fit"),
+    ("competitor-analysis", "/course/{k}/competitor-analysis"),
+    ("most-in-demand-topics", "/courses/most-in-demand-topics"),
+    ("emerging-topics", "/courses/emerging-topics"),
+    ("get-candidate", "/candidates/{c}"),
+]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "n": len(ms),
+        "mean": round(float(ms.mean()), 3),
+        "p50": round(float(np.percentile(ms, 50)), 3),
+        "p95": round(float(np.percentile(ms, 95)), 3),
+        "p99": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def time_calls(fn, inputs):
+    samples = []
+    for args in inputs:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_startup():
+    """One-off costs paid by the first request after a (re)load."""
+    from services.candidate_service import candidate_store
+    from services.job_service import job_store
+    from services.course_service import course_store
+    from services.skill_gap_engine import get_skill_matrix
+    from services.market_analytics import market
+
+    timings = {}
+    for name, fn in (
+        ("load_candidates", candidate_store.refresh),
+        ("load_jobs", job_store.refresh),
+        ("load_courses", course_store.refresh),
+        ("build_skill_matrix", get_skill_matrix),
+        ("market_table", market.table),
+    ):
+        start = time.perf_counter()
+        fn()
+        timings[name] = round((time.perf_counter() - start) * 1000.0, 3)
+    return timings
+
+
+def bench_services(ids, calls, rng):
+    from services.candidate_service import get_candidate_by_id
+    from services.course_service import search_courses_by_topic
+    from services.skill_gap_engine import compute_skill_gap
+    from services.match_engine import top_candidates_for_job, top_jobs_for_candidate
+    from services.data_versions import dependency_versions
+    from services.tool_views import list_candidates_compact, topic_frequencies
+    from benchmarks.synthetic_data import BASE_TOPICS
+
+    cands, jobs = ids["candidates"], ids["jobs"]
+    return {
+        "get_candidate_by_id": time_calls(get_candidate_by_id, [(rng.choice(cands),) for _ in range(calls)]),
+        "search_courses_by_topic": time_calls(search_courses_by_topic, [(rng.choice(BASE_TOPICS),) for _ in range(calls)]),
+        "compute_skill_gap": time_calls(compute_skill_gap, [(rng.choice(cands), rng.choice(jobs)) for _ in range(calls)]),
+        "top_candidates_for_job": time_calls(top_candidates_for_job, [(rng.choice(jobs),) for _ in range(min(calls, 50))]),
+        "top_jobs_for_candidate": time_calls(top_jobs_for_candidate, [(rng.choice(cands),) for _ in range(calls)]),
+        "dependency_versions": time_calls(
+            dependency_versions, [(f"candidate:{rng.choice(cands)}", f"job:{rng.choice(jobs)}", "courses") for _ in range(calls)]
+        ),
+        "tool_list_candidates": time_calls(list_candidates_compact, [(str(rng.randrange(len(cands))),) for _ in range(calls)]),
+        "tool_topic_frequency": time_calls(topic_frequencies, [("candidates 20",) for _ in range(min(calls, 50))]),
+    }
+
+
+def bench_cache(calls):
+    from api.cache import cache_get, cache_set, memory
+
+    value = {"summary": "x" * 500, "structured": {"scores": list(range(50))}}
+    keys = [f"bench:{i}" for i in range(calls)]
+    result = {"set": time_calls(cache_set, [(key, value) for key in keys])}
+    result["memory_hit"] = time_calls(cache_get, [(key,) for key in keys])
+    memory.clear()
+    result["sqlite_hit"] = time_calls(cache_get, [(key,) for key in keys])
+    result["miss"] = time_calls(cache_get, [(f"bench:missing:{i}",) for i in range(calls)])
+    return result
+
+
+async def bench_endpoints(app, ids, requests, concurrency, rng):
+    """
+    For each endpoint: a cold pass over random ids (mostly cache misses, so
+    agent runs), then the same requests again (all cache hits). Requests run
+    `concurrency` at a time.
+    """
+    import httpx
+
+    def paths(template):
+        return [
+            template.format(c=rng.choice(ids["candidates"]), j=rng.choice(ids["jobs"]), k=rng.choice(ids["courses"]))
+            for _ in range(requests)
+        ]
+
+    async def run_all(client, urls):
+        slots = asyncio.Semaphore(concurrency)
+        samples = []
+        errors = 0
+
+        async def one(url):
+            nonlocal errors
+            async with slots:
+                start = time.perf_counter()
+                response = await client.get(url)
+                samples.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(url) for url in urls))
+        elapsed = time.perf_counter() - start
+        return {**summarize(samples), "errors": errors, "throughput_rps": round(len(urls) / elapsed, 1)}
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, template in ENDPOINTS:
+            urls = paths(template)
+            results[name] = {"cold": await run_all(client, urls), "warm": await run_all(client, urls)}
+    return results
+
+
+def _row(name, stats):
+    extra = f"  {stats['throughput_rps']:>8} req/s" if "throughput_rps" in stats else ""
+    print(f"{name:<44} p50 {stats['p50']:>9.3f}  p95 {stats['p95']:>9.3f}  p99 {stats['p99']:>9.3f} ms{extra}")
+
+
+def print_table(title, rows):
+    print(f"\n== {title} ==")
+    for name, stats in rows.items():
+        if not isinstance(stats, dict):
+            print(f"{name:<44} {stats} ms")
+        elif "p50" in stats:
+            _row(name, stats)
+        else:
+            for phase, inner in stats.items():
+                _row(f"{name} [{phase}]", inner)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline latency/throughput benchmarks for the services, cache and API.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="1k", help="Synthetic data size (ignored with --data-dir)")
+    parser.add_argument("--data-dir", help="Use existing candidates/jobs/courses JSON files instead of generating them")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM latency per call, seconds")
+    parser.add_argument("--tokens", type=int, default=60, help="Words in each fake LLM answer")
+    parser.add_argument("--tool-calls", type=int, default=2, help="Tool calls per fake ReAct run")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint and pass")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--service-calls", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the generated data, snapshot and cache.db")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="agent-bench-")
+    try:
+        run(args, workdir)
+    finally:
+        if args.keep_workdir:
+            print(f"Workdir kept: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run(args, workdir):
+    data_dir = args.data_dir or write_dataset(os.path.join(workdir, "data"), SCALES[args.scale], seed=args.seed)
+    # Must be set before the services are imported: they resolve paths at import time.
+    os.environ["AGENT_DATA_DIR"] = data_dir
+    os.environ["AGENT_CACHE_DB"] = os.path.join(workdir, "cache.db")
+
+    import api.api as api
+    from agents.candidate_agent import CandidateAgent
+    from agents.job_agent import JobAgent
+    from agents.course_agent import CourseAgent
+
+    llm = BenchmarkChatModel(latency=args.latency, tokens=args.tokens, tool_calls=args.tool_calls)
+    for agent_cls in (CandidateAgent, JobAgent, CourseAgent):
+        api._agents[agent_cls] = agent_cls(llm=llm, verbose=False)
+
+    rng = random.Random(args.seed)
+    results = {"config": {**vars(args), "data_dir": data_dir}}
+    results["startup_ms"] = bench_startup()
+
+    from services.candidate_service import candidate_store
+    from services.job_service import job_store
+    from services.course_service import course_store
+    ids = {
+        "candidates": candidate_store.ids(),
+        "jobs": job_store.ids(),
+        "courses": course_store.ids(),
+    }
+
+    results["services"] = bench_services(ids, args.service_calls, rng)
+    results["cache"] = bench_cache(args.service_calls)
+    results["endpoints"] = asyncio.run(bench_endpoints(api.app, ids, args.requests, args.concurrency, rng))
+
+    print(f"Data: {data_dir} ({', '.join(f'{len(v)} {k}' for k, v in ids.items())})")
+    print_table("Startup", results["startup_ms"])
+    print_table("Services", results["services"])
+    print_table("Cache", results["cache"])
+    print_table("Endpoints", results["endpoints"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+# Candidate counts per named scale; jobs and courses are derived from it.
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+BASE_TOPICS = [
+    "Algorithms", "Data Structures", "SQL", "Linear Algebra", "Probability", "Statistics",
+    "Machine Learning", "Deep Learning", "Transformers", "Python", "Distributed Systems",
+    "Cloud Computing", "Databases", "Networking", "Security", "Computer Vision",
+    "Natural Language Processing", "Reinforcement Learning", "Optimization", "Data Visualization",
+]
+
+
+def topic_vocabulary(size: int = 200):
+    """BASE_TOPICS followed by numbered specialisations ("Machine Learning 3") up to `size` topics."""
+    topics = list(BASE_TOPICS)
+    level = 2
+    while len(topics) < size:
+        topics.extend(f"{t} {level}" for t in BASE_TOPICS)
+        level += 1
+    return topics[:size]
+
+
+def _topic_sets(rng, vocab, log_weights, count, low, high, chunk=10_000):
+    """
+    `count` topic lists of low..high-1 distinct topics each, drawn without
+    replacement in proportion to the weights (Gumbel top-k, one chunk at a time).
+    """
+    sizes = rng.integers(low, high, size=count)
+    sets = []
+    for start in range(0, count, chunk):
+        keys = log_weights + rng.gumbel(size=(min(chunk, count - start), len(vocab)))
+        best = np.argpartition(-keys, high - 2, axis=1)[:, :high - 1]
+        order = np.take_along_axis(keys, best, axis=1).argsort(axis=1)[:, ::-1]
+        best = np.take_along_axis(best, order, axis=1)
+        for row, size in zip(best, sizes[start:start + chunk]):
+            sets.append([vocab[i] for i in row[:size]])
+    return sets
+
+
+def _levels(rng, count, low, high):
+    return np.round(rng.uniform(low, high, size=count), 1).tolist()
+
+
+def generate(candidates: int, jobs: int = None, courses: int = None, topics: int = 200, seed: int = 0):
+    """
+    Return (candidates, jobs, courses) record lists shaped like the files in data/.
+    Topic popularity is skewed (Zipf-like) so a few topics dominate, as in real postings.
+    """
+    rng = np.random.default_rng(seed)
+    jobs = jobs if jobs is not None else max(10, candidates // 100)
+    courses = courses if courses is not None else max(10, candidates // 1000)
+    vocab = topic_vocabulary(topics)
+    log_weights = -np.log(np.arange(1, len(vocab) + 1))
+
+    candidate_records = []
+    for i, names in enumerate(_topic_sets(rng, vocab, log_weights, candidates, 3, 9)):
+        candidate_records.append({
+            "id": i + 1,
+            "name": f"Candidate {i + 1}",
+            "topics": dict(zip(names, _levels(rng, len(names), 0.1, 1.0))),
+        })
+
+    job_records = []
+    for i, names in enumerate(_topic_sets(rng, vocab, log_weights, jobs, 3, 7)):
+        job_records.append({
+            "id": 100_000_000 + i + 1,
+            "title": f"{names[0]} Engineer {i + 1}",
+            "required_topics": dict(zip(names, _levels(rng, len(names), 0.5, 0.9))),
+        })
+
+    course_records = []
+    for i, names in enumerate(_topic_sets(rng, vocab, log_weights, courses, 1, 5)):
+        course_records.append({
+            "id": 200_000_000 + i + 1,
+            "title": f"{names[0]} Course {i + 1}",
+            "topics": names,
+        })
+
+    return candidate_records, job_records, course_records
+
+
+def write_dataset(out_dir: str, candidates: int, seed: int = 0, **kwargs):
+    """Write candidates.json, jobs.json and courses.json into out_dir (usable as AGENT_DATA_DIR)."""
+    os.makedirs(out_dir, exist_ok=True)
+    records = generate(candidates, seed=seed, **kwargs)
+    for name, data in zip(("candidates", "jobs", "courses"), records):
+        with open(os.path.join(out_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic candidates/jobs/courses data set.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="1k")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_dataset(args.out, SCALES[args.scale], seed=args.seed)
+    print(f"Wrote {args.scale} data set to {args.out}")
@@ -1,10 +1,17 @@
-import json
 import os
 import re
 
+from services.data_store import JsonDataset, iter_records
+from services.topic_index import TopicIndex, normalize_topic
+
 # Resolve path relative to this script’s folder
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CANDIDATES_FILE = os.path.join(BASE_DIR, "../../data/candidates.json")
+# AGENT_DATA_DIR points the services at another data set (e.g. benchmark data).
+DATA_DIR = os.getenv("AGENT_DATA_DIR", os.path.join(BASE_DIR, "../../data"))
+CANDIDATES_FILE = os.path.join(DATA_DIR, "candidates.json")
+
+candidate_store = JsonDataset(CANDIDATES_FILE)
+candidate_topic_index = TopicIndex(candidate_store, "topics")
 
 def get_candidate_topics(input_str: str):
     """
@@ -21,12 +28,9 @@ def get_candidate_topics(input_str: str):
     if not os.path.exists(CANDIDATES_FILE):
         return {"error": f"File {CANDIDATES_FILE} not found"}
 
-    with open(CANDIDATES_FILE, "r") as f:
-        candidates = json.load(f)
-
-    for cand in candidates:
-        if cand["id"] == candidate_id:
-            return cand
+    cand = candidate_store.get(candidate_id)
+    if cand is not None:
+        return cand
 
     return {"error": f"Candidate with id={candidate_id} not found"}
 
@@ -38,8 +42,17 @@ def list_candidates(input_str: str = None):
     if not os.path.exists(CANDIDATES_FILE):
         return {"error": f"File {CANDIDATES_FILE} not found"}
 
-    with open(CANDIDATES_FILE, "r") as f:
-        return json.load(f)
+    return list(candidate_store.records())
+
+def iter_candidates():
+    """
+    Stream all candidates straight from the file, one record at a time, without
+    loading the whole file. For exports too large to hold in memory.
+    """
+    if not os.path.exists(CANDIDATES_FILE):
+        return {"error": f"File {CANDIDATES_FILE} not found"}
+
+    return iter_records(CANDIDATES_FILE)
 
 def get_candidate_by_id(candidate_id):
     """
@@ -53,15 +66,45 @@ def get_candidate_by_id(candidate_id):
     if not os.path.exists(CANDIDATES_FILE):
         return {"error": f"File {CANDIDATES_FILE} not found"}
 
-    with open(CANDIDATES_FILE, "r") as f:
-        candidates = json.load(f)
-
-    for cand in candidates:
-        if cand["id"] == candidate_id:
-            return cand
+    cand = candidate_store.get(candidate_id)
+    if cand is not None:
+        return cand
 
     return {"error": f"Candidate with id={candidate_id} not found"}
 
+def search_candidates_by_topic(topic: str, prefix: bool = False):
+    """
+    Return candidates whose topics include the given topic.
+    Matching ignores case and extra whitespace; prefix=True matches every
+    topic starting with the given text.
+    """
+    if not os.path.exists(CANDIDATES_FILE):
+        return {"error": f"File {CANDIDATES_FILE} not found"}
+
+    ids = candidate_topic_index.prefix_lookup(topic) if prefix else candidate_topic_index.lookup(topic)
+    return [r for r in map(candidate_store.get, ids) if r is not None]
+
+def topic_level_summary(topics):
+    """
+    For each topic: how many candidates list it and their average level.
+    """
+    if not os.path.exists(CANDIDATES_FILE):
+        return {"error": f"File {CANDIDATES_FILE} not found"}
+
+    summary = {}
+    for topic in topics:
+        key = normalize_topic(topic)
+        levels = []
+        for cand in map(candidate_store.get, candidate_topic_index.lookup(topic)):
+            if cand is None:
+                continue
+            levels.extend(v for t, v in cand["topics"].items() if normalize_topic(t) == key)
+        summary[topic] = {
+            "candidates": len(levels),
+            "average_level": round(sum(levels) / len(levels), 2) if levels else 0.0,
+        }
+    return summary
+
 # -----------------------
 # Test block
 # -----------------------
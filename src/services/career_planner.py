@@ -0,0 +1,293 @@
+import math
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from services.candidate_service import candidate_store
+from services.course_bundle import course_costs
+from services.course_service import course_store, course_topic_index
+from services.job_service import job_store
+from services.skill_gap_engine import compute_skill_gap, get_skill_matrix
+from services.topic_index import normalize_topic
+
+# Months of study per 1.0 of level gained (a milestone takes at least a month).
+MONTHS_PER_LEVEL = 6.0
+# Topics studied side by side.
+PARALLEL_TOPICS = 2
+# A is a prerequisite of B when at least this share of the candidates listing
+# B also list A, A is the more widely held topic of the two, and the link is
+# backed by the catalogue or the job itself (see PREREQUISITE_RULE).
+PREREQ_SUPPORT = 0.6
+PREREQUISITE_RULE = (
+    f"A topic is a prerequisite of another when at least {PREREQ_SUPPORT:.0%} of the candidates "
+    "holding the second also hold the first, the first is the more widely held, "
+    "and either some course covers both or the job requires the second at a "
+    "higher level."
+)
+# Courses suggested per milestone.
+SUGGESTED_COURSES = 2
+# Co-occurrence masks are 64-bit: jobs listing more topics than this only
+# get prerequisite edges among their first MAX_TOPICS topics.
+MAX_TOPICS = 64
+
+
+@dataclass
+class JobSkeleton:
+    """
+    The candidate-independent part of a job's plan: its required topics in
+    prerequisite order, each topic's prerequisites among them and the
+    courses to suggest for it.
+    """
+    job_id: int
+    topics: List[str]
+    required: Dict[str, float]
+    prerequisites: Dict[str, List[str]] = field(default_factory=dict)
+    courses: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def _prerequisite_order(matrix, topic_ids, levels):
+    """
+    Order the given topics and link them into a DAG from the candidates
+    data: more widely held topics come first, and an edge A -> B is kept
+    when A is usually held by those who hold B. Co-occurrence alone links
+    any topics a few candidates happen to share, so the edge also needs
+    either a course covering both A and B or the job asking for B at a
+    higher level than A (its `levels`). Edges only point forward in the
+    order, so the graph is acyclic by construction.
+    Returns: (order as positions into topic_ids, {position: [prerequisite positions]}).
+    """
+    k = min(len(topic_ids), MAX_TOPICS)
+    masks = np.zeros(len(matrix.candidate_ids), dtype=np.uint64)
+    counts = np.zeros(len(topic_ids), dtype=np.int64)
+    for i, t in enumerate(topic_ids):
+        rows, _ = matrix.candidates.column(int(t))
+        counts[i] = len(rows)
+        if i < k:
+            masks[rows] |= np.uint64(1 << i)
+
+    # Co-occurrence counts from the distinct topic combinations held.
+    together = np.zeros((k, k), dtype=np.int64)
+    combos, freq = np.unique(masks[masks > 0], return_counts=True)
+    for mask, n in zip(combos.tolist(), freq.tolist()):
+        bits = [i for i in range(k) if mask >> i & 1]
+        together[np.ix_(bits, bits)] += n
+
+    names = [normalize_topic(matrix.topics[t]) for t in topic_ids]
+    courses = [set(course_topic_index.lookup(matrix.topics[t])) for t in topic_ids]
+    order = sorted(range(len(topic_ids)), key=lambda i: (-counts[i], names[i]))
+    prerequisites = {i: [] for i in order}
+    for a_rank, a in enumerate(order):
+        for b in order[a_rank + 1:]:
+            if a < k and b < k and counts[b] and together[a, b] >= PREREQ_SUPPORT * counts[b]:
+                if courses[a] & courses[b] or levels[b] > levels[a]:
+                    prerequisites[b].append(a)
+    return order, prerequisites
+
+
+def _suggested_courses(topics):
+    """
+    Per topic, the courses to suggest: those covering most of the job's
+    topics first, then the cheapest.
+    """
+    covering = {topic: course_topic_index.lookup(topic) for topic in topics}
+    overlap = Counter(cid for ids in covering.values() for cid in ids)
+    costs = course_costs()
+    suggested = {}
+    for topic, ids in covering.items():
+        best = sorted((cid for cid in ids if cid in costs), key=lambda cid: (-overlap[cid], costs[cid], cid))
+        suggested[topic] = [(course_store.get(cid) or {}).get("title", "") for cid in best[:SUGGESTED_COURSES]]
+    return suggested
+
+
+def build_skeleton(matrix, job_id: int) -> JobSkeleton:
+    topic_ids, levels = matrix.jobs.row(matrix.job_pos[job_id])
+    order, prerequisites = _prerequisite_order(matrix, topic_ids, levels)
+    labels = [matrix.topics[t] for t in topic_ids]
+    return JobSkeleton(
+        job_id=job_id,
+        topics=[labels[i] for i in order],
+        required={labels[i]: round(float(levels[i]), 4) for i in order},
+        prerequisites={labels[i]: [labels[p] for p in prerequisites[i]] for i in order},
+        courses=_suggested_courses(labels[i] for i in order),
+    )
+
+
+_lock = threading.Lock()
+_skeletons = {}
+_skeletons_version = None
+
+
+def job_skeleton(job_id: int) -> JobSkeleton:
+    """
+    The plan skeleton of a job, built once and shared by every candidate
+    until candidates.json, jobs.json or courses.json changes.
+    """
+    global _skeletons, _skeletons_version
+    version = (candidate_store.version(), job_store.version(), course_store.version())
+    with _lock:
+        if _skeletons_version != version:
+            _skeletons, _skeletons_version = {}, version
+        skeletons = _skeletons
+    skeleton = skeletons.get(job_id)
+    if skeleton is None:
+        skeleton = skeletons[job_id] = build_skeleton(get_skill_matrix(), job_id)
+    return skeleton
+
+
+def precompute_skeletons(job_ids=None) -> int:
+    """Build the skeletons of the given jobs (all by default). Returns how many were built."""
+    matrix = get_skill_matrix()
+    job_ids = matrix.job_ids if job_ids is None else [j for j in job_ids if j in matrix.job_pos]
+    for job_id in job_ids:
+        job_skeleton(job_id)
+    return len(job_ids)
+
+
+def _schedule(topics, months, prerequisites, parallel: int):
+    """
+    List-schedule a DAG of topics onto `parallel` study tracks: the first
+    track to free up takes the topic that can start on it soonest, and of
+    those the one with the longest chain of work from it to the end, ties
+    in prerequisite order.
+
+    The critical path is read off the schedule itself: walking back from
+    the last topic to finish, each step goes to whatever held up the
+    current topic's start, i.e. the prerequisite it waited for or else the
+    topic before it on its track. Its months add up to the timeline.
+    Returns: ({topic: (start, end)}, critical path as a list of topics).
+    """
+    successors = {topic: [] for topic in topics}
+    for topic in topics:
+        for p in prerequisites[topic]:
+            successors[p].append(topic)
+    tail = {}
+    for topic in reversed(topics):
+        tail[topic] = months[topic] + max((tail[s] for s in successors[topic]), default=0)
+
+    rank = {topic: i for i, topic in enumerate(topics)}
+    tracks = [0] * max(parallel, 1)
+    last_on_track = [None] * len(tracks)
+    slots, held_by, pending = {}, {}, list(topics)
+    while pending:
+        track = min(range(len(tracks)), key=lambda i: (tracks[i], i))
+        ready = {
+            t: max([tracks[track]] + [slots[p][1] for p in prerequisites[t]])
+            for t in pending if all(p in slots for p in prerequisites[t])
+        }
+        topic = min(ready, key=lambda t: (ready[t], -tail[t], rank[t]))
+        start = ready[topic]
+        blockers = [p for p in prerequisites[topic] if slots[p][1] == start]
+        if blockers:
+            held_by[topic] = max(blockers, key=lambda p: (slots[p][0], -rank[p]))
+        elif start > 0:
+            held_by[topic] = last_on_track[track]
+        slots[topic] = (start, start + months[topic])
+        tracks[track], last_on_track[track] = slots[topic][1], topic
+        pending.remove(topic)
+
+    critical = []
+    if topics:
+        topic = max(topics, key=lambda t: (slots[t][1], -rank[t]))
+        while topic is not None:
+            critical.append(topic)
+            topic = held_by.get(topic)
+    return slots, critical[::-1]
+
+
+def plan_career_path(candidate_id, job_id, months_per_level: float = MONTHS_PER_LEVEL, parallel: int = PARALLEL_TOPICS):
+    """
+    Ordered learning plan taking a candidate to a job's requirements.
+
+    The job's topics form a prerequisite DAG (see job_skeleton(), shared by
+    every candidate); the candidate's gaps from the skill-gap engine pick
+    the milestones and size them (months_per_level months per level of gap),
+    and the milestones are scheduled onto `parallel` study tracks.
+    Returns: dict with candidate_id, job_id, milestones [{topic,
+    current_level, target_level, gap, prerequisites, suggested_courses,
+    months, start_month, end_month}] in start order, timeline_months,
+    critical_path (the back-to-back milestones that set timeline_months)
+    and prerequisite_rule (how prerequisites were inferred), or an error
+    dict.
+    """
+    gap = compute_skill_gap(candidate_id, job_id)
+    if "error" in gap:
+        return gap
+
+    skeleton = job_skeleton(gap["job_id"])
+    gaps = {g["topic"]: g["gap"] for g in gap["gaps"]}
+    topics = [topic for topic in skeleton.topics if topic in gaps]
+    months = {topic: max(1, math.ceil(round(gaps[topic] * months_per_level, 6))) for topic in topics}
+    # Prerequisites the candidate already meets don't hold anything up.
+    prerequisites = {topic: [p for p in skeleton.prerequisites[topic] if p in gaps] for topic in topics}
+    slots, critical = _schedule(topics, months, prerequisites, parallel)
+
+    rank = {topic: i for i, topic in enumerate(topics)}
+    milestones = [
+        {
+            "topic": topic,
+            "current_level": round(skeleton.required[topic] - gaps[topic], 4),
+            "target_level": skeleton.required[topic],
+            "gap": gaps[topic],
+            "prerequisites": prerequisites[topic],
+            "suggested_courses": skeleton.courses[topic],
+            "months": months[topic],
+            "start_month": slots[topic][0],
+            "end_month": slots[topic][1],
+        }
+        for topic in sorted(topics, key=lambda t: (slots[t][0], rank[t]))
+    ]
+    return {
+        "candidate_id": gap["candidate_id"],
+        "job_id": gap["job_id"],
+        "milestones": milestones,
+        "timeline_months": max((end for _, end in slots.values()), default=0),
+        "critical_path": critical,
+        "prerequisite_rule": PREREQUISITE_RULE,
+    }
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    print("job_skeleton(105):")
+    print(job_skeleton(105), "\n")
+
+    print("plan_career_path(1, 105):")
+    print(plan_career_path(1, 105), "\n")
+
+    print("plan_career_path(3, 101, parallel=1):")
+    print(plan_career_path(3, 101, parallel=1), "\n")
+
+    print("plan_career_path(99, 101) (non-existent candidate):")
+    print(plan_career_path(99, 101), "\n")
+
+    # Random DAGs: every schedule respects prerequisites and track count, and
+    # its critical path runs back to back from month 0 to the timeline's end.
+    import random
+
+    rng = random.Random(0)
+    for trial in range(3000):
+        n, parallel = rng.randint(0, 8), rng.randint(1, 3)
+        topics = [f"t{i}" for i in range(n)]
+        months = {t: rng.randint(1, 6) for t in topics}
+        prerequisites = {t: [p for p in topics[:i] if rng.random() < 0.3] for i, t in enumerate(topics)}
+        slots, critical = _schedule(topics, months, prerequisites, parallel)
+
+        assert set(slots) == set(topics), trial
+        for t in topics:
+            start, end = slots[t]
+            assert end - start == months[t] and start >= 0, trial
+            assert all(slots[p][1] <= start for p in prerequisites[t]), trial
+        for month in range(max((end for _, end in slots.values()), default=0)):
+            assert sum(start <= month < end for start, end in slots.values()) <= parallel, trial
+
+        makespan = max((end for _, end in slots.values()), default=0)
+        assert sum(months[t] for t in critical) == makespan, trial
+        if critical:
+            assert slots[critical[0]][0] == 0 and slots[critical[-1]][1] == makespan, trial
+            assert all(slots[a][1] == slots[b][0] for a, b in zip(critical, critical[1:])), trial
+    print("_schedule: 3000 random DAGs OK")
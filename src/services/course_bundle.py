@@ -0,0 +1,261 @@
+import threading
+
+from services.course_service import course_store, course_topic_index
+from services.skill_gap_engine import compute_skill_gap
+
+# Branch-and-bound is tried when the gap and the useful courses are this small...
+EXACT_MAX_TOPICS = 24
+EXACT_MAX_COURSES = 60
+# ...and gives up (keeping the best bundle found so far) after this many nodes.
+EXACT_MAX_NODES = 20000
+
+
+def _cost(course, cost_field: str) -> float:
+    """The course's cost, or 1.0 when it has none (then the bundle is simply the smallest)."""
+    try:
+        cost = float(course.get(cost_field, 1.0))
+    except (TypeError, ValueError):
+        return 1.0
+    return cost if cost > 0 else 1.0
+
+
+_lock = threading.Lock()
+_costs = {}  # cost_field -> (course_store version, {course id: cost})
+
+
+def course_costs(cost_field: str = "cost") -> dict:
+    """{course id: cost} for the whole catalogue, rebuilt only when courses.json changes."""
+    version = course_store.version()
+    cached = _costs.get(cost_field)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _lock:
+        cached = _costs.get(cost_field)
+        if cached is None or cached[0] != version:
+            cached = _costs[cost_field] = (version, {c["id"]: _cost(c, cost_field) for c in course_store.records()})
+        return cached[1]
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def _options(masks, costs, limit: int = EXACT_MAX_COURSES):
+    """
+    Courses worth considering, as (mask, cost, id): the cheapest course for
+    each distinct topic set, minus those covering a subset of another
+    course's topics at no lower cost. That last pass is quadratic, so it
+    stops once more than `limit` courses survive it.
+    Returns: (options, whether the dominance pass completed).
+    """
+    cheapest = {}
+    for cid, mask in masks.items():
+        best = cheapest.get(mask)
+        if best is None or (costs[cid], cid) < (best[1], best[2]):
+            cheapest[mask] = (mask, costs[cid], cid)
+
+    kept = []
+    for option in sorted(cheapest.values(), key=lambda o: (-_popcount(o[0]), o[1], o[2])):
+        mask, cost = option[0], option[1]
+        if not any(mask & other[0] == mask and other[1] <= cost for other in kept):
+            kept.append(option)
+            if len(kept) > limit:
+                return list(cheapest.values()), False
+    return kept, True
+
+
+def _greedy(options, target, weights):
+    """
+    Weighted set cover, greedily: repeatedly take the course with the most
+    newly covered topics per unit of cost (ties: larger gaps covered, then
+    lower cost, then lower id).
+    """
+    def covered_gap(mask):
+        total = 0.0
+        while mask:
+            bit = mask & -mask
+            total += weights[bit.bit_length() - 1]
+            mask ^= bit
+        return total
+
+    chosen, remaining = [], target
+    while remaining:
+        def value(option):
+            new = option[0] & remaining
+            return _popcount(new) / option[1], covered_gap(new), -option[1], -option[2]
+
+        best = max(options, key=value)
+        chosen.append(best)
+        remaining &= ~best[0]
+    return chosen
+
+
+def _branch_and_bound(options, target, incumbent):
+    """
+    Cheapest exact cover of `target` (ties: fewer courses), starting from
+    the greedy bundle as the bound. Branches on the lowest uncovered topic.
+    Returns (bundle, proven optimal).
+    """
+    covering = {}
+    for option in sorted(options, key=lambda o: (o[1], o[2])):
+        mask = option[0]
+        while mask:
+            bit = mask & -mask
+            covering.setdefault(bit, []).append(option)
+            mask ^= bit
+    widest = max(_popcount(o[0] & target) for o in options)
+    cheapest = min(o[1] for o in options)
+
+    best = [incumbent, (sum(o[1] for o in incumbent), len(incumbent))]
+    nodes = 0
+
+    def search(remaining, chosen, cost):
+        nonlocal nodes
+        if not remaining:
+            if (cost, len(chosen)) < best[1]:
+                best[0], best[1] = list(chosen), (cost, len(chosen))
+            return True
+        nodes += 1
+        if nodes > EXACT_MAX_NODES:
+            return False
+        # Every further course covers at most `widest` topics and costs at least `cheapest`.
+        needed = -(-_popcount(remaining) // widest)
+        if (cost + needed * cheapest, len(chosen) + needed) >= best[1]:
+            return True
+        for option in covering[remaining & -remaining]:
+            if (cost + option[1], len(chosen) + 1) >= best[1]:
+                break
+            chosen.append(option)
+            complete = search(remaining & ~option[0], chosen, cost + option[1])
+            chosen.pop()
+            if not complete:
+                return False
+        return True
+
+    optimal = search(target, [], 0.0)
+    return best[0], optimal
+
+
+def _cover(masks, costs, weights, target: int, exact: bool = True):
+    """
+    Courses covering `target` (the topics any course covers): greedy, then
+    branch-and-bound when the input is small enough.
+    Returns: ([(mask, cost, id)], proven optimal).
+    """
+    if not target:
+        return [], True
+    options, pruned = _options(masks, costs)
+    chosen = _greedy(options, target, weights)
+    optimal = len(chosen) == 1 and costs[chosen[0][2]] == min(costs.values())
+    if exact and not optimal and pruned and len(weights) <= EXACT_MAX_TOPICS:
+        chosen, optimal = _branch_and_bound(options, target, chosen)
+    return chosen, optimal
+
+
+def solve_course_bundle(candidate_id, job_id, cost_field: str = "cost", exact: bool = True, gap=None):
+    """
+    Cheapest set of courses covering a candidate's missing topics for a job
+    (the smallest set when courses carry no `cost_field`).
+
+    The gap comes from the skill-gap engine (or `gap`, if already computed).
+    Only courses found through the topic index under a missing topic are
+    considered. Greedy weighted set cover always runs; for small inputs
+    branch-and-bound then improves it to a proven optimum.
+    Returns: dict with missing_topics [{topic, gap}], courses [{id, title,
+    cost, covers}], uncovered_topics, total_cost and optimal, or an error dict.
+    """
+    if gap is None:
+        gap = compute_skill_gap(candidate_id, job_id)
+    if "error" in gap:
+        return gap
+
+    missing = [g["topic"] for g in gap["gaps"]]
+    weights = [g["gap"] for g in gap["gaps"]]
+    masks = {}
+    for i, topic in enumerate(missing):
+        for cid in course_topic_index.lookup(topic):
+            masks[cid] = masks.get(cid, 0) | 1 << i
+
+    catalogue = course_costs(cost_field)
+    masks = {cid: mask for cid, mask in masks.items() if cid in catalogue}
+    costs = {cid: catalogue[cid] for cid in masks}
+
+    target = 0
+    for mask in masks.values():
+        target |= mask
+    chosen, optimal = _cover(masks, costs, weights, target, exact)
+
+    chosen = sorted(chosen, key=lambda o: (-_popcount(o[0]), o[1], o[2]))
+    titles = {cid: (course_store.get(cid) or {}).get("title", "") for _, _, cid in chosen}
+    return {
+        "candidate_id": gap["candidate_id"],
+        "job_id": gap["job_id"],
+        "missing_topics": gap["gaps"],
+        "courses": [
+            {
+                "id": cid,
+                "title": titles[cid],
+                "cost": cost,
+                "covers": [topic for i, topic in enumerate(missing) if mask >> i & 1],
+            }
+            for mask, cost, cid in chosen
+        ],
+        "uncovered_topics": [topic for i, topic in enumerate(missing) if not target >> i & 1],
+        "total_cost": round(sum(o[1] for o in chosen), 4),
+        "optimal": optimal,
+    }
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    print("solve_course_bundle(1, 101):")
+    print(solve_course_bundle(1, 101), "\n")
+
+    print("solve_course_bundle(3, 105):")
+    print(solve_course_bundle(3, 105), "\n")
+
+    print("solve_course_bundle(3, 105, exact=False):")
+    print(solve_course_bundle(3, 105, exact=False), "\n")
+
+    print("solve_course_bundle(99, 101) (non-existent candidate):")
+    print(solve_course_bundle(99, 101), "\n")
+
+    # Random catalogues against brute force over every subset of courses.
+    import itertools
+    import random
+
+    rng = random.Random(0)
+    proven = 0
+    for trial in range(2000):
+        n_topics, n_courses = rng.randint(1, 7), rng.randint(1, 9)
+        masks = {cid: rng.randint(1, (1 << n_topics) - 1) for cid in range(n_courses)}
+        costs = {cid: float(rng.choice([1, 1, 2, 3, 5])) for cid in masks}
+        weights = [rng.random() for _ in range(n_topics)]
+        target = 0
+        for mask in masks.values():
+            target |= mask
+
+        cheapest = float("inf")
+        for size in range(1, n_courses + 1):
+            for subset in itertools.combinations(masks, size):
+                covered = 0
+                for cid in subset:
+                    covered |= masks[cid]
+                if covered == target:
+                    cheapest = min(cheapest, sum(costs[cid] for cid in subset))
+
+        for exact in (False, True):
+            chosen, optimal = _cover(masks, costs, weights, target, exact)
+            covered = 0
+            for mask, cost, cid in chosen:
+                assert masks[cid] == mask and costs[cid] == cost
+                covered |= mask
+            assert covered == target, (trial, exact)
+            total = sum(o[1] for o in chosen)
+            assert total >= cheapest - 1e-9, (trial, exact)
+            if optimal:
+                assert abs(total - cheapest) < 1e-9, (trial, exact, total, cheapest)
+        proven += optimal
+    print(f"brute force: 2000 random catalogues OK, {proven} proven optimal")
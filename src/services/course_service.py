@@ -1,9 +1,16 @@
-import json
 import os
 import re
 
+from services.data_store import JsonDataset, iter_records
+from services.topic_index import TopicIndex
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-COURSES_FILE = os.path.join(BASE_DIR, "../../data/courses.json")
+# AGENT_DATA_DIR points the services at another data set (e.g. benchmark data).
+DATA_DIR = os.getenv("AGENT_DATA_DIR", os.path.join(BASE_DIR, "../../data"))
+COURSES_FILE = os.path.join(DATA_DIR, "courses.json")
+
+course_store = JsonDataset(COURSES_FILE)
+course_topic_index = TopicIndex(course_store, "topics")
 
 def get_course_details(input_str: str):
     """
@@ -20,31 +27,30 @@ def get_course_details(input_str: str):
     if not os.path.exists(COURSES_FILE):
         return {"error": f"File {COURSES_FILE} not found"}
 
-    with open(COURSES_FILE, "r") as f:
-        courses = json.load(f)
-
-    for course in courses:
-        if course["id"] == course_id:
-            return course
+    course = course_store.get(course_id)
+    if course is not None:
+        return course
 
     return {"error": f"Course with id={course_id} not found"}
 
 
-def search_courses_by_topic(topic: str):
+def search_courses_by_topic(topic: str, prefix: bool = False):
     """
     Search for courses that cover a given topic.
-    Input: topic name (e.g. "Probability").
+    Input: topic name (e.g. "Probability"), matched ignoring case and extra
+    whitespace. A trailing "*" (e.g. "Prob*") or prefix=True matches every
+    topic starting with the given text.
     Returns: list of matching courses.
     """
     topic = topic.strip().strip("'\"")  # remove stray quotes
+    if topic.endswith("*"):
+        topic, prefix = topic[:-1], True
 
     if not os.path.exists(COURSES_FILE):
         return {"error": f"File {COURSES_FILE} not found"}
 
-    with open(COURSES_FILE, "r") as f:
-        courses = json.load(f)
-
-    matches = [c for c in courses if topic in c["topics"]]
+    ids = course_topic_index.prefix_lookup(topic) if prefix else course_topic_index.lookup(topic)
+    matches = [c for c in map(course_store.get, ids) if c is not None]
 
     if not matches:
         return {"error": f"No courses found for topic '{topic}'"}
@@ -59,8 +65,29 @@ def list_courses(input_str: str = None):
     if not os.path.exists(COURSES_FILE):
         return {"error": f"File {COURSES_FILE} not found"}
 
-    with open(COURSES_FILE, "r") as f:
-        return json.load(f)
+    return list(course_store.records())
+
+def iter_courses():
+    """
+    Stream all courses straight from the file, one record at a time, without
+    loading the whole file. For exports too large to hold in memory.
+    """
+    if not os.path.exists(COURSES_FILE):
+        return {"error": f"File {COURSES_FILE} not found"}
+
+    return iter_records(COURSES_FILE)
+
+def courses_covering(topics):
+    """
+    Return every course covering at least one of the given topics, in id order.
+    """
+    if not os.path.exists(COURSES_FILE):
+        return {"error": f"File {COURSES_FILE} not found"}
+
+    ids = set()
+    for topic in topics:
+        ids.update(course_topic_index.lookup(topic))
+    return [c for c in map(course_store.get, sorted(ids)) if c is not None]
 
 def get_course_by_id(course_id):
     """
@@ -74,12 +101,9 @@ def get_course_by_id(course_id):
     if not os.path.exists(COURSES_FILE):
         return {"error": f"File {COURSES_FILE} not found"}
 
-    with open(COURSES_FILE, "r") as f:
-        courses = json.load(f)
-
-    for course in courses:
-        if course["id"] == course_id:
-            return course
+    course = course_store.get(course_id)
+    if course is not None:
+        return course
 
     return {"error": f"Course with id={course_id} not found"}
 
@@ -110,6 +134,12 @@ if __name__ == "__main__":
     print("6. search_courses_by_topic('Machine Learning'):")
     print(search_courses_by_topic("Machine Learning"), "\n")
 
+    print("6b. search_courses_by_topic(' machine learning ') (normalized):")
+    print(search_courses_by_topic(" machine learning "), "\n")
+
+    print("6c. search_courses_by_topic('Prob*') (prefix):")
+    print(search_courses_by_topic("Prob*"), "\n")
+
     print("7. search_courses_by_topic('NonExistentTopic'):")
     print(search_courses_by_topic("NonExistentTopic"), "\n")
 
@@ -0,0 +1,223 @@
+import codecs
+import hashlib
+import json
+import os
+import threading
+
+# Bytes read per step by iter_records().
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+def iter_records(path: str, hasher=None, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield the records of a data file one at a time, reading it in chunks, so
+    the buffer stays bounded by (about twice) the largest record rather than
+    the file size. JsonDataset still keeps every parsed record; only callers
+    that consume this generator directly (the list endpoints) stream.
+
+    Accepts a JSON array ([{...}, {...}]) or NDJSON (one record per line;
+    any whitespace-separated sequence of JSON values works). If a hasher is
+    given (e.g. hashlib.sha256()), it is fed every byte of the file.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, eof = "", 0, False
+    array = None  # unknown until the first non-whitespace character
+
+    with open(path, "rb") as f:
+        while True:
+            # Skip separators; in an array, commas sit between records.
+            while pos < len(buf) and (buf[pos] in _WHITESPACE or (array and buf[pos] == ",")):
+                pos += 1
+
+            if pos < len(buf):
+                if array is None:
+                    array = buf[pos] == "["
+                    if array:
+                        pos += 1
+                        continue
+                if array and buf[pos] == "]":
+                    if hasher is not None:
+                        for chunk in iter(lambda: f.read(chunk_size), b""):
+                            hasher.update(chunk)
+                    return
+                try:
+                    record, end = _decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A number may be cut short by the buffer end, or stop early at a
+                    # split like "2." | "5": only trust it once a delimiter follows.
+                    number = isinstance(record, (int, float)) and not isinstance(record, bool)
+                    if eof or (end < len(buf) and (not number or buf[end] in _DELIMITERS)):
+                        yield record
+                        pos = end
+                        continue
+            elif eof:
+                if array:
+                    raise json.JSONDecodeError("Unterminated array", buf, pos)
+                return
+
+            # raw_decode can't resume a partial record, so each retry re-scans
+            # it: read at least as much again as is pending, doubling the
+            # buffer, so a record spanning many chunks costs linear time.
+            chunk = f.read(max(chunk_size, len(buf) - pos))
+            if hasher is not None:
+                hasher.update(chunk)
+            eof = not chunk
+            buf = buf[pos:] + decode.decode(chunk, final=eof)
+            pos = 0
+
+
+class JsonDataset:
+    """
+    In-memory view of a JSON (array or NDJSON) file holding a list of records.
+
+    The file is parsed once and indexed by id. Every access does a cheap
+    os.stat() and the file is only re-read when its mtime or size changed,
+    so lookups are O(1) dict hits instead of a json.load + linear scan.
+
+    If a snapshot built from exactly this version of the file exists (see
+    services/snapshot.py), records are served from its memory-mapped columns
+    instead, so nothing is parsed up front.
+
+    Derived structures (e.g. topic indexes) can subscribe() to be told which
+    records were added/changed or removed; they are told on refresh().
+
+    fingerprint() / record_fingerprint() are content hashes of the whole file
+    and of a single record, used to version cached results that depend on them.
+    """
+
+    def __init__(self, path: str, id_field: str = "id", use_snapshot: bool = True):
+        self.path = path
+        self.id_field = id_field
+        self.use_snapshot = use_snapshot
+        self._lock = threading.Lock()
+        # (signature, records, by_id, digest, record digests, snapshot columns)
+        # swapped as one tuple so readers never see a records list that
+        # doesn't match the index.
+        self._state = (None, [], {}, None, {}, None)
+        self._listeners = []
+        # State the listeners were last told about.
+        self._notify_lock = threading.Lock()
+        self._notified = self._state
+
+    def _signature(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        signature = self._signature()
+        state = self._state
+        if state[0] == signature:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state[0] == signature:
+                return state
+
+            from services.snapshot import load_columns  # imported late: snapshot builds on iter_records
+
+            columns = load_columns(self.path, signature) if self.use_snapshot else None
+            if columns is not None:
+                records, by_id, digest = columns.records, columns.by_id, columns.digest
+            else:
+                hasher = hashlib.sha256()
+                records = tuple(iter_records(self.path, hasher))
+                by_id = {rec[self.id_field]: rec for rec in records}
+                digest = hasher.hexdigest()[:16]
+
+            self._state = (signature, records, by_id, digest, {}, columns)
+            return self._state
+
+    def subscribe(self, listener):
+        """
+        Register listener(changed: mapping id->record, removed: list of ids).
+        If subscribers were already told about loaded data, the listener is
+        primed with every record.
+        """
+        with self._notify_lock:
+            self._listeners.append(listener)
+            if self._notified[0] is not None:
+                listener(self._notified[2], [])
+
+    def refresh(self):
+        """
+        Re-read the file if it changed since the last access, and tell
+        subscribers which records changed since they were last told. This
+        happens here rather than on every load, so opening a snapshot stays
+        cheap until a derived structure is actually used.
+        """
+        state = self._load()
+        if self._notified is state:
+            return
+        with self._notify_lock:
+            old = self._notified
+            if old is state:
+                return
+            by_id, old_by_id = state[2], old[2]
+            if old[0] is None:
+                changed, removed = by_id, []
+            else:
+                changed = {rid: rec for rid, rec in by_id.items() if old_by_id.get(rid) != rec}
+                removed = [rid for rid in old_by_id if rid not in by_id]
+            for listener in self._listeners:
+                listener(changed, removed)
+            self._notified = state
+
+    def version(self):
+        """Opaque token that changes whenever the file is reloaded."""
+        return self._load()[0]
+
+    def fingerprint(self) -> str:
+        """Content hash of the whole file; unchanged by a touch or an identical rewrite."""
+        return self._load()[3]
+
+    def record_fingerprint(self, record_id) -> str:
+        """Content hash of one record ("missing" if there is no such record)."""
+        state = self._load()
+        digest = state[4].get(record_id)
+        if digest is None:
+            record = state[2].get(record_id)
+            if record is None:
+                return "missing"
+            canonical = json.dumps(record, sort_keys=True).encode()
+            digest = state[4][record_id] = hashlib.sha256(canonical).hexdigest()[:16]
+        return digest
+
+    def columns(self):
+        """
+        The memory-mapped snapshot columns (services.snapshot.ColumnarDataset)
+        the records are served from, or None when they were parsed from JSON.
+        """
+        return self._load()[5]
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def records(self):
+        """
+        All records, in file order, as a read-only sequence. Backed by a
+        snapshot, a record is only decoded when indexed, so take pages by
+        index or slice rather than copying the whole sequence.
+        """
+        return self._load()[1]
+
+    def ids(self):
+        """Every record id, in file order, without decoding snapshot records."""
+        state = self._load()
+        if state[5] is not None:
+            return state[5].ids.tolist()
+        return [rec[self.id_field] for rec in state[1]]
+
+    def get(self, record_id):
+        """Return the record with the given id, or None."""
+        return self._load()[2].get(record_id)
+
+    def __len__(self):
+        return len(self._load()[1])
@@ -0,0 +1,50 @@
+import asyncio
+
+from services.candidate_service import candidate_store
+from services.job_service import job_store
+from services.course_service import course_store
+
+# "candidate:1" style dependencies resolve to one record of these stores...
+RECORD_STORES = {"candidate": candidate_store, "job": job_store, "course": course_store}
+# ...and "candidates" style dependencies to the whole file.
+DATASET_STORES = {"candidates": candidate_store, "jobs": job_store, "courses": course_store}
+
+
+def dependency_versions(*deps) -> dict:
+    """
+    Resolve data dependencies to content fingerprints.
+
+    A dependency is either a record ("candidate:1", "job:101", "course:201")
+    or a whole dataset ("candidates", "jobs", "courses"). Folding the result
+    into a cache key means editing candidate 1 only changes the keys of
+    results that depend on candidate 1 (or on every candidate).
+    """
+    versions = {}
+    for dep in deps:
+        kind, _, record_id = dep.partition(":")
+        if record_id:
+            store = RECORD_STORES[kind]
+            try:
+                record_id = int(record_id)
+            except ValueError:
+                pass
+            versions[dep] = store.record_fingerprint(record_id) if store.exists() else "missing"
+        else:
+            store = DATASET_STORES[kind]
+            versions[dep] = store.fingerprint() if store.exists() else "missing"
+    return versions
+
+
+async def adependency_versions(*deps) -> dict:
+    """
+    Async twin of dependency_versions(). Resolving a dependency can (re)load
+    its data file, so it runs in a worker thread rather than on the event loop.
+    """
+    return await asyncio.to_thread(dependency_versions, *deps)
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    print(dependency_versions("candidate:1", "candidate:99", "job:101", "courses"))
@@ -1,10 +1,17 @@
-import json
 import os
 import re
 
+from services.data_store import JsonDataset, iter_records
+from services.topic_index import TopicIndex
+
 # Resolve path relative to this script’s folder
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-JOBS_FILE = os.path.join(BASE_DIR, "../../data/jobs.json")
+# AGENT_DATA_DIR points the services at another data set (e.g. benchmark data).
+DATA_DIR = os.getenv("AGENT_DATA_DIR", os.path.join(BASE_DIR, "../../data"))
+JOBS_FILE = os.path.join(DATA_DIR, "jobs.json")
+
+job_store = JsonDataset(JOBS_FILE)
+job_topic_index = TopicIndex(job_store, "required_topics")
 
 def get_job_requirements(input_str: str):
     """
@@ -21,12 +28,9 @@ def get_job_requirements(input_str: str):
     if not os.path.exists(JOBS_FILE):
         return {"error": f"File {JOBS_FILE} not found"}
 
-    with open(JOBS_FILE, "r") as f:
-        jobs = json.load(f)
-
-    for job in jobs:
-        if job["id"] == job_id:
-            return job
+    job = job_store.get(job_id)
+    if job is not None:
+        return job
 
     return {"error": f"Job with id={job_id} not found"}
 
@@ -38,8 +42,17 @@ def list_jobs(input_str: str = None):
     if not os.path.exists(JOBS_FILE):
         return {"error": f"File {JOBS_FILE} not found"}
 
-    with open(JOBS_FILE, "r") as f:
-        return json.load(f)
+    return list(job_store.records())
+
+def iter_jobs():
+    """
+    Stream all jobs straight from the file, one record at a time, without
+    loading the whole file. For exports too large to hold in memory.
+    """
+    if not os.path.exists(JOBS_FILE):
+        return {"error": f"File {JOBS_FILE} not found"}
+
+    return iter_records(JOBS_FILE)
 
 def get_job_by_id(job_id):
     """
@@ -54,15 +67,36 @@ def get_job_by_id(job_id):
     if not os.path.exists(JOBS_FILE):
         return {"error": f"File {JOBS_FILE} not found"}
 
-    with open(JOBS_FILE, "r") as f:
-        jobs = json.load(f)
-
-    for job in jobs:
-        if job["id"] == job_id:
-            return job
+    job = job_store.get(job_id)
+    if job is not None:
+        return job
 
     return {"error": f"Job with id={job_id} not found"}
 
+def search_jobs_by_topic(topic: str, prefix: bool = False):
+    """
+    Return jobs whose required_topics include the given topic.
+    Matching ignores case and extra whitespace; prefix=True matches every
+    topic starting with the given text.
+    """
+    if not os.path.exists(JOBS_FILE):
+        return {"error": f"File {JOBS_FILE} not found"}
+
+    ids = job_topic_index.prefix_lookup(topic) if prefix else job_topic_index.lookup(topic)
+    return [r for r in map(job_store.get, ids) if r is not None]
+
+def jobs_requiring(topics):
+    """
+    Return every job whose required_topics include at least one of the given topics, in id order.
+    """
+    if not os.path.exists(JOBS_FILE):
+        return {"error": f"File {JOBS_FILE} not found"}
+
+    ids = set()
+    for topic in topics:
+        ids.update(job_topic_index.lookup(topic))
+    return [j for j in map(job_store.get, sorted(ids)) if j is not None]
+
 # -----------------------
 # Test block
 # -----------------------
@@ -0,0 +1,135 @@
+import threading
+from collections import Counter
+
+from services.job_service import job_store, job_topic_index
+from services.course_service import course_store
+from services.topic_index import normalize_topic
+
+
+class MarketAnalytics:
+    """
+    Topic demand (jobs asking for it, and the sum of the levels they ask
+    for) and supply (courses covering it), kept up to date incrementally:
+    it subscribes to both datasets and only re-counts the records that
+    changed on a reload.
+    """
+
+    def __init__(self, jobs, courses):
+        self.jobs = jobs
+        self.courses = courses
+        self._lock = threading.Lock()
+        self._job_levels = {}      # job id -> {topic key: required level}
+        self._course_keys = {}     # course id -> set of topic keys
+        self._demand = Counter()   # topic key -> number of jobs
+        self._weight = Counter()   # topic key -> sum of required levels
+        self._supply = Counter()   # topic key -> number of courses
+        self._labels = {}          # topic key -> topic name as written in the data
+        jobs.subscribe(self._apply_jobs)
+        courses.subscribe(self._apply_courses)
+
+    def _apply_jobs(self, changed, removed):
+        with self._lock:
+            for jid in list(removed) + list(changed):
+                for key, level in self._job_levels.pop(jid, {}).items():
+                    self._demand[key] -= 1
+                    self._weight[key] -= level
+            for jid, job in changed.items():
+                levels = {}
+                for topic, level in (job.get("required_topics") or {}).items():
+                    key = normalize_topic(topic)
+                    self._labels.setdefault(key, topic)
+                    levels[key] = float(level)
+                for key, level in levels.items():
+                    self._demand[key] += 1
+                    self._weight[key] += level
+                self._job_levels[jid] = levels
+
+    def _apply_courses(self, changed, removed):
+        with self._lock:
+            for cid in list(removed) + list(changed):
+                for key in self._course_keys.pop(cid, ()):
+                    self._supply[key] -= 1
+            for cid, course in changed.items():
+                keys = set()
+                for topic in course.get("topics") or []:
+                    key = normalize_topic(topic)
+                    self._labels.setdefault(key, topic)
+                    keys.add(key)
+                for key in keys:
+                    self._supply[key] += 1
+                self._course_keys[cid] = keys
+
+    def table(self):
+        """
+        One row per topic any job or course mentions:
+        {topic, demand, weighted_demand, average_level, supply, gap}.
+        gap is the weighted demand per covering course (+1), so an uncovered
+        topic that many jobs ask for at a high level scores highest.
+        """
+        self.jobs.refresh()
+        self.courses.refresh()
+        with self._lock:
+            keys = {k for k, n in self._demand.items() if n > 0} | {k for k, n in self._supply.items() if n > 0}
+            rows = []
+            for key in sorted(keys):
+                demand = self._demand[key] if self._demand[key] > 0 else 0
+                weight = self._weight[key] if demand else 0.0
+                supply = self._supply[key] if self._supply[key] > 0 else 0
+                rows.append({
+                    "topic": self._labels.get(key, key),
+                    "demand": demand,
+                    "weighted_demand": round(weight, 2),
+                    "average_level": round(weight / demand, 2) if demand else 0.0,
+                    "supply": supply,
+                    "gap": round(weight / (supply + 1), 2),
+                })
+            return rows
+
+
+market = MarketAnalytics(job_store, course_store)
+
+
+def in_demand_topics(k: int = 10):
+    """Topics most requested by jobs: by job count, then by weighted demand."""
+    rows = [r for r in market.table() if r["demand"] > 0]
+    rows.sort(key=lambda r: (-r["demand"], -r["weighted_demand"]))
+    return rows[:k]
+
+
+def emerging_topics(k: int = 5):
+    """
+    Topics asked for by more jobs than there are courses covering them,
+    largest demand-supply gap first.
+    """
+    rows = [r for r in market.table() if r["demand"] > r["supply"]]
+    rows.sort(key=lambda r: (-r["gap"], -r["demand"]))
+    return rows[:k]
+
+
+def co_required_topics(topic, k: int = 3):
+    """Topics most often required together with `topic` by the same jobs."""
+    key = normalize_topic(topic)
+    counts = Counter()
+    for job in map(job_store.get, job_topic_index.lookup(topic)):
+        if job is None:
+            continue
+        counts.update(t for t in job["required_topics"] if normalize_topic(t) != key)
+    return [t for t, _ in counts.most_common(k)]
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    print("1. market.table():")
+    for row in market.table():
+        print(row)
+
+    print("\n2. in_demand_topics(3):")
+    print(in_demand_topics(3))
+
+    print("\n3. emerging_topics():")
+    print(emerging_topics())
+
+    print("\n4. co_required_topics('Transformers'):")
+    print(co_required_topics("Transformers"))
@@ -0,0 +1,153 @@
+import numpy as np
+
+from services.skill_gap_engine import get_skill_matrix
+from services.topic_matrix import top_k
+
+
+def _scores_for_job(matrix, j: int) -> np.ndarray:
+    """
+    Weighted match score of every candidate against job row j:
+    sum_t min(current_t, required_t) / sum_t required_t.
+    Each required topic weighs as much as the level the job asks for, and
+    skill above the requirement earns no extra credit. 1.0 is a full match.
+    Only the candidates listing one of the job's topics are touched.
+    """
+    topics, required = matrix.jobs.row(j)
+    return matrix.candidates.accumulate(topics, required, np.minimum) / matrix.job_requirements[j]
+
+
+def _scores_for_candidate(matrix, c: int) -> np.ndarray:
+    """The same score for candidate row c against every job."""
+    topics, levels = matrix.candidates.row(c)
+    return matrix.jobs.accumulate(topics, levels, np.minimum) / matrix.job_requirements
+
+
+def score_matrix(candidate_ids=None, job_ids=None) -> np.ndarray:
+    """
+    Match scores of shape (candidates, jobs) for the given ids (all by default),
+    rows/columns in the order given or in file order.
+    """
+    matrix = get_skill_matrix()
+    cand = slice(None) if candidate_ids is None else [matrix.candidate_pos[c] for c in candidate_ids]
+    jobs = range(len(matrix.job_ids)) if job_ids is None else [matrix.job_pos[j] for j in job_ids]
+    n_cand = len(matrix.candidate_ids) if candidate_ids is None else len(cand)
+    scores = np.empty((n_cand, len(jobs)), dtype=np.float32)
+    for col, j in enumerate(jobs):
+        scores[:, col] = _scores_for_job(matrix, j)[cand]
+    return scores
+
+
+def _ranked_candidates(matrix, j: int, scores: np.ndarray, k: int):
+    best = top_k(scores, k)
+    gaps = matrix.gaps_for_rows(best, np.full(len(best), j))
+    return [
+        {"candidate_id": matrix.candidate_ids[c], "score": round(float(scores[c]), 4), "gaps": matrix.gap_list(*gap)}
+        for c, gap in zip(best, gaps)
+    ]
+
+
+def top_candidates_for_job(job_id, k: int = 10):
+    """
+    Rank every candidate against a job and return the k best.
+    Returns: list of {candidate_id, score, gaps}, or an error dict.
+    """
+    try:
+        job_id = int(job_id)
+    except (ValueError, TypeError):
+        return {"error": f"Invalid job_id: {job_id}"}
+
+    matrix = get_skill_matrix()
+    if job_id not in matrix.job_pos:
+        return {"error": f"Job with id={job_id} not found"}
+
+    j = matrix.job_pos[job_id]
+    return _ranked_candidates(matrix, j, _scores_for_job(matrix, j), k)
+
+
+def top_candidates_for_jobs(job_ids, k: int = 10):
+    """
+    top_candidates_for_job() for several jobs, validated and ranked against
+    one snapshot of the skill matrix.
+    Returns: list in the same order as job_ids, each a ranking or an error dict.
+    """
+    matrix = get_skill_matrix()
+    results = [None] * len(job_ids)
+    known = []
+    for i, job_id in enumerate(job_ids):
+        try:
+            job_id = int(job_id)
+        except (ValueError, TypeError):
+            results[i] = {"error": f"Invalid job_id: {job_id}"}
+            continue
+        if job_id not in matrix.job_pos:
+            results[i] = {"error": f"Job with id={job_id} not found"}
+        else:
+            known.append((i, matrix.job_pos[job_id]))
+
+    for i, j in known:
+        results[i] = _ranked_candidates(matrix, j, _scores_for_job(matrix, j), k)
+    return results
+
+
+def top_jobs_for_candidate(candidate_id, k: int = 10):
+    """
+    Rank every job for a candidate and return the k best.
+    Returns: list of {job_id, score, gaps}, or an error dict.
+    """
+    try:
+        candidate_id = int(candidate_id)
+    except (ValueError, TypeError):
+        return {"error": f"Invalid candidate_id: {candidate_id}"}
+
+    matrix = get_skill_matrix()
+    if candidate_id not in matrix.candidate_pos:
+        return {"error": f"Candidate with id={candidate_id} not found"}
+
+    c = matrix.candidate_pos[candidate_id]
+    scores = _scores_for_candidate(matrix, c)
+    best = top_k(scores, k)
+    gaps = matrix.gaps_for_rows(np.full(len(best), c), best)
+    return [
+        {"job_id": matrix.job_ids[j], "score": round(float(scores[j]), 4), "gaps": matrix.gap_list(*gap)}
+        for j, gap in zip(best, gaps)
+    ]
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    from services.candidate_service import candidate_store
+    from services.job_service import job_store
+    from services.topic_index import normalize_topic
+
+    # Cross-check the vectorized scores and rankings against a plain loop.
+    candidates, jobs = candidate_store.records(), job_store.records()
+    for col, job in enumerate(jobs):
+        required = {normalize_topic(t): level for t, level in job["required_topics"].items()}
+        naive = []
+        for cand in candidates:
+            current = {normalize_topic(t): level for t, level in cand["topics"].items()}
+            covered = sum(min(current.get(t, 0.0), level) for t, level in required.items())
+            naive.append(covered / (sum(required.values()) or 1.0))
+        assert np.allclose(score_matrix(job_ids=[job["id"]])[:, 0], naive, atol=1e-5), job["id"]
+        ranked = top_candidates_for_job(job["id"], k=len(candidates))
+        by_id = dict(zip((c["id"] for c in candidates), naive))
+        in_order = [by_id[r["candidate_id"]] for r in ranked]
+        assert np.allclose(in_order, sorted(naive, reverse=True), atol=1e-5), job["id"]
+    print(f"score_matrix/top_candidates_for_job match the naive loop on {len(candidates)}x{len(jobs)} pairs\n")
+
+    print("score_matrix():")
+    print(score_matrix(), "\n")
+
+    print("top_candidates_for_job(101, k=2):")
+    print(top_candidates_for_job(101, k=2), "\n")
+
+    print("top_candidates_for_jobs([101, 102], k=2):")
+    print(top_candidates_for_jobs([101, 102], k=2), "\n")
+
+    print("top_jobs_for_candidate(3, k=3):")
+    print(top_jobs_for_candidate(3, k=3), "\n")
+
+    print("top_candidates_for_job(999) (non-existent):")
+    print(top_candidates_for_job(999), "\n")
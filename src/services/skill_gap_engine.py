@@ -0,0 +1,218 @@
+import functools
+import threading
+
+import numpy as np
+
+from services.candidate_service import candidate_store
+from services.job_service import job_store
+from services.topic_index import normalize_topic
+from services.topic_matrix import TopicMatrix
+
+
+class SkillMatrix:
+    """
+    Sparse score matrices (TopicMatrix) over a shared topic vocabulary.
+
+    Row i of candidates holds candidate i's level per topic, row j of jobs
+    the level job j requires; topics a record does not list score 0. Rows
+    follow the order of the records in the data files.
+    """
+
+    def __init__(self, candidates, jobs):
+        labels = {}
+        for rec in candidates:
+            for topic in rec["topics"]:
+                labels.setdefault(normalize_topic(topic), topic)
+        for rec in jobs:
+            for topic in rec["required_topics"]:
+                labels.setdefault(normalize_topic(topic), topic)
+
+        keys = sorted(labels)
+        self.topics = [labels[k] for k in keys]
+        self.topic_pos = {k: i for i, k in enumerate(keys)}
+
+        self.candidate_ids = [rec["id"] for rec in candidates]
+        self.candidate_pos = {cid: i for i, cid in enumerate(self.candidate_ids)}
+        self.candidates = self._sparse(candidates, "topics")
+
+        self.job_ids = [rec["id"] for rec in jobs]
+        self.job_pos = {jid: i for i, jid in enumerate(self.job_ids)}
+        self.jobs = self._sparse(jobs, "required_topics")
+
+    @classmethod
+    def from_columns(cls, candidates, jobs):
+        """
+        Wrap memory-mapped snapshot columns (services.snapshot.ColumnarDataset):
+        their CSR arrays are used as they are, without parsing or copying.
+        The vocabulary is the snapshot's, which also holds course topics;
+        both datasets must come from a build with the same vocabulary.
+        """
+        self = cls.__new__(cls)
+        self.topics = candidates.topics
+        self.topic_pos = {normalize_topic(topic): i for i, topic in enumerate(self.topics)}
+
+        self.candidate_ids = candidates.ids.tolist()
+        self.candidate_pos = {cid: i for i, cid in enumerate(self.candidate_ids)}
+        self.candidates = TopicMatrix(candidates.indptr, candidates.topic_ids, candidates.scores, len(self.topics))
+
+        self.job_ids = jobs.ids.tolist()
+        self.job_pos = {jid: i for i, jid in enumerate(self.job_ids)}
+        self.jobs = TopicMatrix(jobs.indptr, jobs.topic_ids, jobs.scores, len(self.topics))
+        return self
+
+    def _sparse(self, records, field):
+        rows, cols, values = [], [], []
+        for row, rec in enumerate(records):
+            for topic, score in rec[field].items():
+                rows.append(row)
+                cols.append(self.topic_pos[normalize_topic(topic)])
+                values.append(score)
+        return TopicMatrix.from_coo(rows, cols, values, len(records), len(self.topics))
+
+    def gap_vector(self, candidate_id, job_id):
+        """
+        (topics, gaps): max(0, required - current) for every topic the job
+        lists; topics it doesn't list have no gap.
+        """
+        topics, required = self.jobs.row(self.job_pos[job_id])
+        current = self.candidates.row_lookup(self.candidate_pos[candidate_id], topics)
+        return topics, np.maximum(required - current, 0.0)
+
+    def gaps_for_rows(self, candidate_rows, job_rows):
+        """gap_vector() for each (candidate row, job row) pair, in one vectorized pass."""
+        if not len(job_rows):
+            return []
+        owner, topics, required = self.jobs.entries(job_rows)
+        current = self.candidates.lookup(np.asarray(candidate_rows, dtype=np.int64)[owner], topics)
+        gaps = np.maximum(required - current, 0.0)
+        bounds = np.searchsorted(owner, np.arange(1, len(job_rows)))
+        return list(zip(np.split(topics, bounds), np.split(gaps, bounds)))
+
+    @functools.cached_property
+    def job_requirements(self) -> np.ndarray:
+        """Sum of the levels each job requires (1.0 for jobs requiring nothing)."""
+        required = self.jobs.row_sums()
+        required[required == 0] = 1.0
+        return required
+
+    def gap_list(self, topics: np.ndarray, gaps: np.ndarray):
+        """Turn (topics, gaps) into [{"topic", "gap"}], largest gap first."""
+        nonzero = np.flatnonzero(gaps > 0)
+        order = nonzero[np.argsort(-gaps[nonzero], kind="stable")]
+        return [{"topic": self.topics[topics[i]], "gap": round(float(gaps[i]), 4)} for i in order]
+
+
+_lock = threading.Lock()
+_matrix = None
+_matrix_version = None
+
+
+def get_skill_matrix() -> SkillMatrix:
+    """
+    Return the SkillMatrix for the current data files, rebuilding it only
+    when candidates.json or jobs.json changed. Built straight from the
+    snapshot columns when both files have an up-to-date snapshot numbering
+    topics the same way (e.g. not when only jobs.json was rebuilt since the
+    candidates were loaded).
+    """
+    global _matrix, _matrix_version
+    version = (candidate_store.version(), job_store.version())
+    if _matrix_version == version:
+        return _matrix
+
+    with _lock:
+        if _matrix_version != version:
+            candidates, jobs = candidate_store.columns(), job_store.columns()
+            if candidates is not None and jobs is not None and candidates.vocabulary == jobs.vocabulary:
+                _matrix = SkillMatrix.from_columns(candidates, jobs)
+            else:
+                _matrix = SkillMatrix(candidate_store.records(), job_store.records())
+            _matrix_version = version
+        return _matrix
+
+
+def compute_skill_gap(candidate_id, job_id):
+    """
+    Numeric skill gap between a candidate and a job.
+    Returns: dict with candidate_id, job_id and gaps [{topic, gap}], or an error dict.
+    """
+    try:
+        candidate_id, job_id = int(candidate_id), int(job_id)
+    except (ValueError, TypeError):
+        return {"error": f"Invalid candidate_id/job_id: {candidate_id}/{job_id}"}
+
+    matrix = get_skill_matrix()
+    if candidate_id not in matrix.candidate_pos:
+        return {"error": f"Candidate with id={candidate_id} not found"}
+    if job_id not in matrix.job_pos:
+        return {"error": f"Job with id={job_id} not found"}
+
+    return {
+        "candidate_id": candidate_id,
+        "job_id": job_id,
+        "gaps": matrix.gap_list(*matrix.gap_vector(candidate_id, job_id)),
+    }
+
+
+def compute_skill_gaps(pairs):
+    """
+    Skill gaps for a list of (candidate_id, job_id) pairs in one vectorized pass.
+    Returns: list in the same order, each shaped like compute_skill_gap() (or an error dict).
+    """
+    matrix = get_skill_matrix()
+    results = [None] * len(pairs)
+    rows, cand_rows, job_rows = [], [], []
+    for i, (candidate_id, job_id) in enumerate(pairs):
+        try:
+            candidate_id, job_id = int(candidate_id), int(job_id)
+        except (ValueError, TypeError):
+            results[i] = {"error": f"Invalid candidate_id/job_id: {candidate_id}/{job_id}"}
+            continue
+        if candidate_id not in matrix.candidate_pos:
+            results[i] = {"error": f"Candidate with id={candidate_id} not found"}
+        elif job_id not in matrix.job_pos:
+            results[i] = {"error": f"Job with id={job_id} not found"}
+        else:
+            rows.append((i, candidate_id, job_id))
+            cand_rows.append(matrix.candidate_pos[candidate_id])
+            job_rows.append(matrix.job_pos[job_id])
+
+    if rows:
+        gaps = matrix.gaps_for_rows(cand_rows, job_rows)
+        for (i, candidate_id, job_id), (topics, vec) in zip(rows, gaps):
+            results[i] = {"candidate_id": candidate_id, "job_id": job_id, "gaps": matrix.gap_list(topics, vec)}
+    return results
+
+
+def compute_all_skill_gaps():
+    """
+    Skill gaps for every candidate x job pair in one vectorized pass.
+    Returns: list of dicts shaped like compute_skill_gap().
+    """
+    matrix = get_skill_matrix()
+    n_cand, n_jobs = len(matrix.candidate_ids), len(matrix.job_ids)
+    gaps = matrix.gaps_for_rows(np.repeat(np.arange(n_cand), n_jobs), np.tile(np.arange(n_jobs), n_cand))
+    return [
+        {"candidate_id": matrix.candidate_ids[k // n_jobs], "job_id": matrix.job_ids[k % n_jobs], "gaps": matrix.gap_list(*pair)}
+        for k, pair in enumerate(gaps)
+    ]
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    print("compute_skill_gap(1, 101):")
+    print(compute_skill_gap(1, 101), "\n")
+
+    print("compute_skill_gap(99, 101) (non-existent candidate):")
+    print(compute_skill_gap(99, 101), "\n")
+
+    print("compute_skill_gaps([(1, 101), (2, 102), (1, 999)]):")
+    for row in compute_skill_gaps([(1, 101), (2, 102), (1, 999)]):
+        print(row)
+    print()
+
+    print("compute_all_skill_gaps():")
+    for row in compute_all_skill_gaps():
+        print(row)
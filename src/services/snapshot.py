@@ -0,0 +1,269 @@
+import argparse
+import hashlib
+import json
+import os
+from array import array
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from services.data_store import iter_records
+from services.topic_index import normalize_topic
+from services.topic_matrix import TopicMatrix
+
+FORMAT_VERSION = 3
+# Snapshots live next to the JSON files they were built from.
+SNAPSHOT_DIRNAME = "snapshot"
+# Dataset name (file name without .json) -> field holding its topics.
+TOPIC_FIELDS = {"candidates": "topics", "jobs": "required_topics", "courses": "topics"}
+
+
+def snapshot_dir(data_dir: str) -> str:
+    return os.path.join(data_dir, SNAPSHOT_DIRNAME)
+
+
+def _save(directory: str, filename: str, values):
+    """Write one column; readers holding the previous file keep their mapping."""
+    tmp = os.path.join(directory, f".{filename}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp, os.path.join(directory, filename))
+
+
+def build_snapshot(data_dir: str, out_dir: str = None) -> dict:
+    """
+    Compile candidates.json, jobs.json and courses.json into a columnar
+    snapshot, reading each file as a stream. Per dataset:
+
+      {name}.ids.npy        int64 record ids, in file order
+      {name}.sorted_ids.npy int64 ids sorted, with {name}.sorted_rows.npy
+                            the matching rows (id lookups by binary search)
+      {name}.indptr.npy     int64 CSR offsets: row r's topics are
+                            topic_ids/scores[indptr[r]:indptr[r + 1]]
+      {name}.topic_ids.npy  int32 interned topic ids, sorted within a row
+                            (a topic listed twice keeps its last level)
+      {name}.scores.npy     float32 levels (1.0 for course topics)
+      {name}.offsets.npy    int64 offsets of each record in {name}.records.bin,
+                            the compact JSON of the whole record
+
+    topics.json holds the shared vocabulary (topic id -> name, in normalized
+    name order) and manifest.json its content hash plus the stat signature
+    and content hash of every source file. The manifest is written last, and
+    a snapshot is only used while its source files are unchanged.
+    Returns: the manifest.
+    """
+    out_dir = out_dir or snapshot_dir(data_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    interned = {}  # normalized topic -> provisional id, in first-seen order
+    labels = []    # provisional id -> topic name as first written
+    columns = {}
+    manifest = {"format": FORMAT_VERSION, "datasets": {}}
+
+    for name, field in TOPIC_FIELDS.items():
+        path = os.path.join(data_dir, f"{name}.json")
+        if not os.path.exists(path):
+            continue
+        # Taken before reading, so a file rewritten mid-build leaves the snapshot stale.
+        st = os.stat(path)
+        hasher = hashlib.sha256()
+        ids, topic_ids, scores = array("q"), array("i"), array("f")
+        indptr, offsets = array("q", [0]), array("q", [0])
+
+        blob_tmp = os.path.join(out_dir, f".{name}.records.bin.tmp")
+        with open(blob_tmp, "wb") as blob:
+            for record in iter_records(path, hasher):
+                ids.append(record["id"])
+                topics = record.get(field) or {}
+                pairs = topics.items() if isinstance(topics, dict) else ((topic, 1.0) for topic in topics)
+                for topic, score in pairs:
+                    key = normalize_topic(topic)
+                    topic_id = interned.get(key)
+                    if topic_id is None:
+                        topic_id = interned[key] = len(labels)
+                        labels.append(topic)
+                    topic_ids.append(topic_id)
+                    scores.append(score)
+                indptr.append(len(topic_ids))
+                data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                blob.write(data)
+                offsets.append(offsets[-1] + len(data))
+        os.replace(blob_tmp, os.path.join(out_dir, f"{name}.records.bin"))
+
+        ids = np.frombuffer(ids, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        columns[name] = {
+            "ids": ids,
+            "sorted_ids": ids[order],
+            "sorted_rows": order.astype(np.int64),
+            "indptr": np.frombuffer(indptr, dtype=np.int64),
+            # Provisional (first-seen) ids until the renumbering below.
+            "topic_ids": np.frombuffer(topic_ids, dtype=np.int32),
+            "scores": np.frombuffer(scores, dtype=np.float32),
+            "offsets": np.frombuffer(offsets, dtype=np.int64),
+        }
+        manifest["datasets"][name] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "digest": hasher.hexdigest()[:16],
+            "records": len(ids),
+            "entries": len(topic_ids),
+        }
+
+    # Renumber topics in normalized-name order, so ids sort like the names,
+    # and lay each dataset out as a canonical TopicMatrix.
+    keys = list(interned)
+    rank = np.empty(len(keys), dtype=np.int32)
+    rank[np.argsort(np.array(keys, dtype=object), kind="stable")] = np.arange(len(keys), dtype=np.int32)
+    for name, cols in columns.items():
+        rows = np.repeat(np.arange(len(cols["ids"])), np.diff(cols["indptr"]))
+        matrix = TopicMatrix.from_coo(rows, rank[cols["topic_ids"]], cols["scores"], len(cols["ids"]), len(keys))
+        cols["indptr"], cols["topic_ids"], cols["scores"] = matrix.indptr, matrix.indices.astype(np.int32), matrix.data
+        for col, values in cols.items():
+            _save(out_dir, f"{name}.{col}.npy", values)
+
+    vocabulary = [None] * len(labels)
+    for provisional, label in enumerate(labels):
+        vocabulary[rank[provisional]] = label
+    encoded = json.dumps(vocabulary, ensure_ascii=False)
+    with open(os.path.join(out_dir, "topics.json"), "w", encoding="utf-8") as f:
+        f.write(encoded)
+    manifest["vocabulary"] = hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+    tmp = os.path.join(out_dir, ".manifest.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, "manifest.json"))
+    return manifest
+
+
+class _Records(Sequence):
+    """Records of a ColumnarDataset in file order, decoded on access."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns.ids)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.columns.record(r) for r in range(*row.indices(len(self)))]
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        return self.columns.record(row % len(self))
+
+
+class _RecordsById(Mapping):
+    """
+    id -> record view of a ColumnarDataset, decoded on access. Subscribers
+    receiving one can read `columns` instead of decoding every record.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __getitem__(self, record_id):
+        row = self.columns.row(record_id)
+        if row is None:
+            raise KeyError(record_id)
+        return self.columns.record(row)
+
+    def __contains__(self, record_id):
+        return self.columns.row(record_id) is not None
+
+    def __iter__(self):
+        return (int(record_id) for record_id in self.columns.ids)
+
+    def __len__(self):
+        return len(self.columns.ids)
+
+
+class ColumnarDataset:
+    """
+    One dataset of a snapshot, memory-mapped read-only: nothing is parsed or
+    copied when it is opened, and every process mapping the same files
+    shares their pages. Records are decoded one at a time when asked for.
+
+    Topic ids index `topics`; `vocabulary` is its content hash. Datasets
+    loaded from different builds may number topics differently, so their
+    topic ids can only be mixed when their vocabularies match.
+    """
+
+    def __init__(self, directory: str, name: str, meta: dict, topics, vocabulary: str):
+        def column(col):
+            return np.load(os.path.join(directory, f"{name}.{col}.npy"), mmap_mode="r")
+
+        self.name = name
+        self.topic_field = TOPIC_FIELDS[name]
+        self.digest = meta["digest"]
+        self.topics = topics
+        self.vocabulary = vocabulary
+        self.ids = column("ids")
+        self.sorted_ids = column("sorted_ids")
+        self.sorted_rows = column("sorted_rows")
+        self.indptr = column("indptr")
+        self.topic_ids = column("topic_ids")
+        self.scores = column("scores")
+        self.offsets = column("offsets")
+        blob_path = os.path.join(directory, f"{name}.records.bin")
+        self.blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if os.path.getsize(blob_path) else np.empty(0, np.uint8)
+        self.records = _Records(self)
+        self.by_id = _RecordsById(self)
+
+    def row(self, record_id):
+        """Row of the record with this id (the last one, if repeated), or None."""
+        try:
+            record_id = int(record_id)
+        except (ValueError, TypeError):
+            return None
+        pos = int(np.searchsorted(self.sorted_ids, record_id, side="right")) - 1
+        if pos < 0 or self.sorted_ids[pos] != record_id:
+            return None
+        return int(self.sorted_rows[pos])
+
+    def record(self, row: int) -> dict:
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return json.loads(self.blob[start:end].tobytes())
+
+    def row_topics(self, row: int):
+        """(topic ids, scores) of one record, as views into the mapped columns."""
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return self.topic_ids[start:end], self.scores[start:end]
+
+
+def load_columns(path: str, signature):
+    """
+    The snapshot of the data file at `path`, if one was built from exactly
+    this version of it (same (mtime_ns, size) signature); None otherwise.
+    """
+    directory = snapshot_dir(os.path.dirname(path))
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    meta = manifest.get("datasets", {}).get(name)
+    if manifest.get("format") != FORMAT_VERSION or meta is None:
+        return None
+    if (meta["mtime_ns"], meta["size"]) != tuple(signature):
+        return None
+
+    try:
+        with open(os.path.join(directory, "topics.json"), encoding="utf-8") as f:
+            topics = json.load(f)
+        return ColumnarDataset(directory, name, meta, topics, manifest["vocabulary"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+if __name__ == "__main__":
+    from services.candidate_service import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Compile the JSON data files into a memory-mappable columnar snapshot.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out-dir", help=f"Defaults to <data-dir>/{SNAPSHOT_DIRNAME}, where the services look for it")
+    args = parser.parse_args()
+    print(json.dumps(build_snapshot(args.data_dir, args.out_dir), indent=2))
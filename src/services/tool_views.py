@@ -0,0 +1,200 @@
+import json
+import os
+import re
+import threading
+
+from services.candidate_service import candidate_store, candidate_topic_index, CANDIDATES_FILE
+from services.job_service import job_store, job_topic_index, JOBS_FILE
+from services.course_service import course_store, course_topic_index, COURSES_FILE
+from services.match_engine import top_candidates_for_job, top_jobs_for_candidate
+
+# Rough upper bound on the tokens a single tool observation may add to the prompt.
+TOKEN_BUDGET = int(os.getenv("AGENT_TOOL_TOKEN_BUDGET", 1500))
+# Tokenizer of the default agent model (gpt-4o-mini).
+TOKEN_ENCODING = "o200k_base"
+# Topics kept per record in list views, highest level first.
+TOP_TOPICS = 5
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def count_tokens(text: str) -> int:
+    """
+    Token count of `text` for the agent model. Falls back to ~4 characters
+    per token when the tiktoken encoding can't be loaded (e.g. offline).
+    """
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+                except Exception:
+                    _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def compact(value) -> str:
+    """JSON without whitespace: what the tools hand back to the LLM."""
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _top_levels(topics: dict, n: int = TOP_TOPICS) -> dict:
+    best = sorted(topics.items(), key=lambda kv: -kv[1])[:n]
+    return {t: round(level, 2) for t, level in best}
+
+
+def project_candidate(c: dict) -> dict:
+    return {"id": c["id"], "name": c["name"], "top_topics": _top_levels(c["topics"])}
+
+
+def project_job(j: dict) -> dict:
+    return {"id": j["id"], "title": j["title"], "required_topics": _top_levels(j["required_topics"])}
+
+
+def project_course(c: dict) -> dict:
+    return {"id": c["id"], "title": c["title"], "topics": c["topics"][:TOP_TOPICS]}
+
+
+def paginate(records, project, offset: int = 0, budget: int = TOKEN_BUDGET) -> dict:
+    """
+    Project records from `offset` on until the token budget is used up.
+    `records` is any indexable sequence. Always returns at least one record
+    so paging makes progress; next_offset is null on the last page.
+    """
+    items = []
+    used = 0
+    # Index rather than slice: a page only touches the records it emits.
+    for i in range(offset, len(records)):
+        item = project(records[i])
+        cost = count_tokens(compact(item)) + 1
+        if items and used + cost > budget:
+            break
+        items.append(item)
+        used += cost
+    end = offset + len(items)
+    return {
+        "total": len(records),
+        "offset": offset,
+        "next_offset": end if end < len(records) else None,
+        "items": items,
+    }
+
+
+def _offset(input_str) -> int:
+    match = re.search(r"\d+", str(input_str or ""))
+    return int(match.group()) if match else 0
+
+
+def list_candidates_compact(input_str: str = None):
+    """
+    Tool function for LangChain.
+    Input: offset to start from (e.g. "0" or "offset=40"), empty for the first page.
+    Returns: compact JSON page of candidates (id, name, top topics).
+    """
+    if not os.path.exists(CANDIDATES_FILE):
+        return compact({"error": f"File {CANDIDATES_FILE} not found"})
+    return compact(paginate(candidate_store.records(), project_candidate, _offset(input_str)))
+
+
+def list_jobs_compact(input_str: str = None):
+    """
+    Tool function for LangChain.
+    Input: offset to start from, empty for the first page.
+    Returns: compact JSON page of jobs (id, title, top required topics).
+    """
+    if not os.path.exists(JOBS_FILE):
+        return compact({"error": f"File {JOBS_FILE} not found"})
+    return compact(paginate(job_store.records(), project_job, _offset(input_str)))
+
+
+def list_courses_compact(input_str: str = None):
+    """
+    Tool function for LangChain.
+    Input: offset to start from, empty for the first page.
+    Returns: compact JSON page of courses (id, title, first topics).
+    """
+    if not os.path.exists(COURSES_FILE):
+        return compact({"error": f"File {COURSES_FILE} not found"})
+    return compact(paginate(course_store.records(), project_course, _offset(input_str)))
+
+
+TOPIC_INDEXES = {
+    "candidates": (candidate_topic_index, CANDIDATES_FILE),
+    "jobs": (job_topic_index, JOBS_FILE),
+    "courses": (course_topic_index, COURSES_FILE),
+}
+
+
+def topic_frequencies(input_str: str = None):
+    """
+    Tool function for LangChain.
+    Input: dataset name ("jobs", "candidates" or "courses"; default jobs),
+    optionally followed by how many topics to return (e.g. "jobs 10").
+    Returns: compact JSON list of {topic, count}, most frequent first.
+    """
+    text = str(input_str or "").lower()
+    dataset = next((name for name in TOPIC_INDEXES if name.rstrip("s") in text), "jobs")
+    match = re.search(r"\d+", text)
+    k = int(match.group()) if match else 20
+
+    index, path = TOPIC_INDEXES[dataset]
+    if not os.path.exists(path):
+        return compact({"error": f"File {path} not found"})
+
+    counts = [{"topic": t, "count": index.count(t)} for t in index.topics()]
+    counts.sort(key=lambda c: -c["count"])
+    return compact({"dataset": dataset, "topics": counts[:k]})
+
+
+def top_matches(input_str: str):
+    """
+    Tool function for LangChain.
+    Input: "job <id>" for the best candidates for a job, or "candidate <id>"
+    for the best jobs for a candidate; optionally "top <k>" (default 5).
+    Returns: compact JSON list of matches with score and missing topics.
+    """
+    text = str(input_str).lower()
+    k_match = re.search(r"top\s*(\d+)", text)
+    k = int(k_match.group(1)) if k_match else 5
+    id_match = re.search(r"\d+", re.sub(r"top\s*\d+", "", text))
+    if not id_match:
+        return compact({"error": "No job or candidate id provided"})
+
+    if "candidate" in text:
+        ranked = top_jobs_for_candidate(id_match.group(), k=k)
+        id_field = "job_id"
+    else:
+        ranked = top_candidates_for_job(id_match.group(), k=k)
+        id_field = "candidate_id"
+    if isinstance(ranked, dict):
+        return compact(ranked)
+
+    return compact([
+        {id_field: m[id_field], "score": round(m["score"], 2), "missing": [g["topic"] for g in m["gaps"]]}
+        for m in ranked
+    ])
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    print("1. list_candidates_compact(''):")
+    print(list_candidates_compact(""), "\n")
+
+    print("2. list_jobs_compact('offset=1'):")
+    print(list_jobs_compact("offset=1"), "\n")
+
+    print("3. topic_frequencies('jobs 5'):")
+    print(topic_frequencies("jobs 5"), "\n")
+
+    print("4. top_matches('job 101 top 3'):")
+    print(top_matches("job 101 top 3"), "\n")
+
+    print("5. top_matches('candidate 1'):")
+    print(top_matches("candidate 1"), "\n")
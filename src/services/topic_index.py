@@ -0,0 +1,114 @@
+import bisect
+import threading
+
+import numpy as np
+
+
+def normalize_topic(topic) -> str:
+    """
+    Canonical key for a topic name: stray quotes stripped, whitespace
+    collapsed and case folded, so " machine  learning" == "Machine Learning".
+    """
+    return " ".join(str(topic).strip().strip("'\"").split()).casefold()
+
+
+class TopicIndex:
+    """
+    Inverted index topic -> record ids over a JsonDataset.
+
+    `topics_field` may hold a list of topic names (courses) or a dict of
+    topic -> score (candidates, jobs). The index subscribes to the dataset
+    and only re-indexes the records that changed on a reload.
+    """
+
+    def __init__(self, dataset, topics_field: str):
+        self.dataset = dataset
+        self.topics_field = topics_field
+        self._lock = threading.Lock()
+        self._postings = {}      # topic key -> set of record ids
+        self._record_keys = {}   # record id -> set of topic keys
+        self._labels = {}        # topic key -> topic name as written in the data
+        self._sorted_keys = []   # all topic keys, sorted, for prefix search
+        dataset.subscribe(self._apply)
+
+    def _apply(self, changed, removed):
+        columns = getattr(changed, "columns", None)
+        if columns is not None and columns.topic_field == self.topics_field and not self._record_keys:
+            self._index_columns(columns)
+            return
+        with self._lock:
+            for rid in removed:
+                self._unindex(rid)
+            for rid, record in changed.items():
+                self._unindex(rid)
+                keys = set()
+                for topic in record.get(self.topics_field) or []:
+                    key = normalize_topic(topic)
+                    keys.add(key)
+                    self._labels.setdefault(key, topic)
+                    postings = self._postings.get(key)
+                    if postings is None:
+                        postings = self._postings[key] = set()
+                        bisect.insort(self._sorted_keys, key)
+                    postings.add(rid)
+                self._record_keys[rid] = keys
+
+    def _index_columns(self, columns):
+        """Initial build from snapshot columns: postings come from the CSR arrays, no record is decoded."""
+        keys = [normalize_topic(topic) for topic in columns.topics]
+        ids = columns.ids.tolist()
+        indptr = columns.indptr.tolist()
+        topic_ids = np.asarray(columns.topic_ids)
+        entry_ids = np.repeat(columns.ids, np.diff(columns.indptr))
+        order = np.argsort(topic_ids, kind="stable")
+        bounds = np.searchsorted(topic_ids[order], np.arange(len(keys) + 1)).tolist()
+        topic_ids = topic_ids.tolist()
+        with self._lock:
+            for t, key in enumerate(keys):
+                if bounds[t] < bounds[t + 1]:
+                    self._postings.setdefault(key, set()).update(entry_ids[order[bounds[t]:bounds[t + 1]]].tolist())
+                    self._labels.setdefault(key, columns.topics[t])
+            for row, rid in enumerate(ids):
+                self._record_keys[rid] = {keys[t] for t in topic_ids[indptr[row]:indptr[row + 1]]}
+            self._sorted_keys = sorted(self._postings)
+
+    def _unindex(self, rid):
+        for key in self._record_keys.pop(rid, ()):
+            postings = self._postings[key]
+            postings.discard(rid)
+            if not postings:
+                del self._postings[key]
+                del self._labels[key]
+                pos = bisect.bisect_left(self._sorted_keys, key)
+                del self._sorted_keys[pos]
+
+    def lookup(self, topic):
+        """Return the sorted ids of records covering `topic`."""
+        self.dataset.refresh()
+        key = normalize_topic(topic)
+        with self._lock:
+            return sorted(self._postings.get(key, ()))
+
+    def prefix_lookup(self, prefix):
+        """Return the sorted ids of records covering any topic starting with `prefix`."""
+        self.dataset.refresh()
+        key = normalize_topic(prefix)
+        ids = set()
+        with self._lock:
+            pos = bisect.bisect_left(self._sorted_keys, key)
+            while pos < len(self._sorted_keys) and self._sorted_keys[pos].startswith(key):
+                ids.update(self._postings[self._sorted_keys[pos]])
+                pos += 1
+        return sorted(ids)
+
+    def topics(self):
+        """Return every indexed topic name, as written in the data."""
+        self.dataset.refresh()
+        with self._lock:
+            return [self._labels[key] for key in self._sorted_keys]
+
+    def count(self, topic) -> int:
+        """Number of records covering `topic`."""
+        self.dataset.refresh()
+        with self._lock:
+            return len(self._postings.get(normalize_topic(topic), ()))
@@ -0,0 +1,220 @@
+import threading
+
+import numpy as np
+
+
+class TopicMatrix:
+    """
+    Sparse (CSR) matrix of topic scores: one row per record, one column per
+    topic of the vocabulary. Row r's topics are indices[indptr[r]:indptr[r + 1]],
+    sorted, with their scores in data; unlisted topics score 0. Memory grows
+    with the number of listed scores, not rows x vocabulary.
+
+    The arrays are only read, so they can be views into a memory-mapped
+    snapshot. The column-wise (CSC) copy and the lookup keys are built on
+    first use.
+    """
+
+    def __init__(self, indptr, indices, data, n_topics: int):
+        # Plain ndarray views: np.memmap's subclass overhead adds up on small slices.
+        self.indptr = np.asarray(indptr)
+        self.indices = np.asarray(indices)
+        self.data = np.asarray(data)
+        self.shape = (len(indptr) - 1, n_topics)
+        self._lock = threading.Lock()
+        self._keys = None
+        self._csc = None
+
+    @classmethod
+    def from_coo(cls, rows, cols, values, n_rows: int, n_topics: int):
+        """
+        Build from (row, column, score) triplets in any order. Repeated
+        (row, column) pairs keep the last score given, like assigning into a
+        dense matrix would.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float32)
+        order = np.lexsort((np.arange(len(rows)), cols, rows))
+        rows, cols, values = rows[order], cols[order], values[order]
+        last = np.ones(len(rows), dtype=bool)
+        last[:-1] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols, values = rows[last], cols[last], values[last]
+
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        return cls(indptr, cols.astype(np.int32), values, n_topics)
+
+    @property
+    def nnz(self) -> int:
+        return int(self.indptr[-1])
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    def row(self, r: int):
+        """(topics, scores) listed by row r."""
+        start, end = self.indptr[r], self.indptr[r + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def row_lookup(self, r: int, topics) -> np.ndarray:
+        """Scores of row r at the given topics, 0 where not listed."""
+        row_topics, row_scores = self.row(r)
+        if not len(row_topics):
+            return np.zeros(len(topics), dtype=np.float32)
+        pos = np.minimum(np.searchsorted(row_topics, topics), len(row_topics) - 1)
+        return np.where(row_topics[pos] == topics, row_scores[pos], np.float32(0.0))
+
+    def entries(self, rows):
+        """
+        Every listed score of the given rows, concatenated:
+        (owner, topics, scores), where owner[k] is the position in `rows`
+        entry k belongs to.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        owner = np.repeat(np.arange(len(rows)), lengths)
+        pos = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(int(lengths.sum()))
+        return owner, self.indices[pos], self.data[pos]
+
+    def _lookup_keys(self):
+        # row * n_topics + topic for every entry: globally sorted, as rows
+        # are stored in order and topics are sorted within a row.
+        if self._keys is None:
+            with self._lock:
+                if self._keys is None:
+                    rows = np.repeat(np.arange(self.shape[0], dtype=np.int64), np.diff(self.indptr))
+                    self._keys = rows * self.shape[1] + self.indices
+        return self._keys
+
+    def lookup(self, rows, topics) -> np.ndarray:
+        """Scores at (rows[k], topics[k]) for every k, 0 where not listed."""
+        keys = self._lookup_keys()
+        wanted = np.asarray(rows, dtype=np.int64) * self.shape[1] + np.asarray(topics, dtype=np.int64)
+        if not len(keys):
+            return np.zeros(len(wanted), dtype=np.float32)
+        pos = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        return np.where(keys[pos] == wanted, self.data[pos], np.float32(0.0))
+
+    def _columns(self):
+        """(col_indptr, rows, scores): the same scores grouped by topic."""
+        if self._csc is None:
+            with self._lock:
+                if self._csc is None:
+                    order = np.argsort(self.indices, kind="stable")
+                    rows = np.repeat(np.arange(self.shape[0], dtype=np.int64), np.diff(self.indptr))
+                    col_indptr = np.zeros(self.shape[1] + 1, dtype=np.int64)
+                    np.cumsum(np.bincount(self.indices, minlength=self.shape[1]), out=col_indptr[1:])
+                    self._csc = (col_indptr, rows[order], np.asarray(self.data)[order])
+        return self._csc
+
+    def column(self, t: int):
+        """(rows, scores) listing topic t, rows ascending."""
+        col_indptr, col_rows, col_data = self._columns()
+        start, end = col_indptr[t], col_indptr[t + 1]
+        return col_rows[start:end], col_data[start:end]
+
+    def accumulate(self, topics, values, combine=np.multiply) -> np.ndarray:
+        """
+        For every row r: sum over the given topics t of
+        combine(self[r, t], value_t), taken over the rows that list t
+        (so combine(0, v) must be 0). Costs the number of scores listed under
+        those topics, not rows x vocabulary. Returns a dense vector of length
+        rows.
+
+        np.multiply gives dot products with a sparse query vector, np.minimum
+        the weighted coverage of requirements.
+        """
+        col_indptr, col_rows, col_data = self._columns()
+        topics = np.asarray(topics, dtype=np.int64)
+        starts = col_indptr[topics]
+        lengths = col_indptr[topics + 1] - starts
+        pos = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(int(lengths.sum()))
+        weights = combine(col_data[pos], np.repeat(np.asarray(values, dtype=np.float32), lengths))
+        return np.bincount(col_rows[pos], weights=weights, minlength=self.shape[0]).astype(np.float32)
+
+    def row_sums(self) -> np.ndarray:
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        return np.bincount(rows, weights=self.data, minlength=self.shape[0]).astype(np.float32)
+
+    def toarray(self) -> np.ndarray:
+        """Dense copy; only for small matrices (debugging, tests)."""
+        dense = np.zeros(self.shape, dtype=np.float32)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, best first; ties keep index order."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.shape[0]:
+        # argpartition picks arbitrarily among scores tied at the cut: keep
+        # everything above it, then the lowest indices of those on it.
+        cut = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > cut)
+        best = np.concatenate([above, np.flatnonzero(scores == cut)[:k - len(above)]])
+    else:
+        best = np.arange(scores.shape[0])
+    return best[np.lexsort((best, -scores[best]))]
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    m = TopicMatrix.from_coo([0, 0, 1, 2, 2, 0], [3, 1, 2, 0, 3, 1], [0.5, 0.2, 0.9, 0.4, 0.7, 0.6], n_rows=3, n_topics=4)
+    print(m.toarray())
+    print("row(0):", m.row(0))
+    print("lookup:", m.lookup([0, 1, 2, 2], [1, 1, 3, 2]))
+    print("dot with {1: 1.0, 3: 2.0}:", m.accumulate([1, 3], [1.0, 2.0]))
+    print("coverage of {1: 0.5, 3: 0.6}:", m.accumulate([1, 3], [0.5, 0.6], np.minimum))
+    print("top_k:", top_k(np.array([0.2, 0.9, 0.9, 0.1]), 2))
+    print(f"nnz={m.nnz} bytes={m.nbytes}")
+
+    # Every operation against the same computation on a dense copy.
+    rng = np.random.default_rng(0)
+    for trial in range(300):
+        n_rows, n_topics = int(rng.integers(1, 40)), int(rng.integers(1, 30))
+        n = int(rng.integers(0, n_rows * n_topics + 1))
+        rows, cols = rng.integers(0, n_rows, n), rng.integers(0, n_topics, n)
+        values = rng.random(n).astype(np.float32) + np.float32(0.01)
+        dense = np.zeros((n_rows, n_topics), dtype=np.float32)
+        dense[rows, cols] = values  # repeated pairs: the last one wins in both
+        m = TopicMatrix.from_coo(rows, cols, values, n_rows, n_topics)
+
+        assert np.array_equal(m.toarray(), dense)
+        assert m.nnz == np.count_nonzero(dense)
+        for r in range(n_rows):
+            topics, scores = m.row(r)
+            assert np.array_equal(topics, np.flatnonzero(dense[r])) and np.array_equal(scores, dense[r, topics])
+            probe = rng.integers(0, n_topics, 5)
+            assert np.array_equal(m.row_lookup(r, probe), dense[r, probe])
+        for t in range(n_topics):
+            col_rows, col_scores = m.column(t)
+            assert np.array_equal(col_rows, np.flatnonzero(dense[:, t])) and np.array_equal(col_scores, dense[col_rows, t])
+
+        q_rows, q_topics = rng.integers(0, n_rows, 50), rng.integers(0, n_topics, 50)
+        assert np.array_equal(m.lookup(q_rows, q_topics), dense[q_rows, q_topics])
+
+        picked = rng.choice(n_rows, int(rng.integers(0, n_rows + 1)))
+        owner, topics, scores = m.entries(picked)
+        listed = np.nonzero(dense[picked])
+        assert np.array_equal(owner, listed[0]) and np.array_equal(topics, listed[1])
+        assert np.array_equal(scores, dense[picked][listed])
+
+        topics = rng.choice(n_topics, int(rng.integers(0, n_topics + 1)), replace=False)
+        weights = rng.random(len(topics)).astype(np.float32)
+        assert np.allclose(m.accumulate(topics, weights), dense[:, topics] @ weights, atol=1e-5)
+        assert np.allclose(m.accumulate(topics, weights, np.minimum),
+                           np.minimum(dense[:, topics], weights).sum(axis=1), atol=1e-5)
+        assert np.allclose(m.row_sums(), dense.sum(axis=1), atol=1e-5)
+
+        scores = np.round(rng.random(n_rows), 1)  # coarse, so ties are common
+        k = int(rng.integers(0, n_rows + 2))
+        assert np.array_equal(top_k(scores, k), np.lexsort((np.arange(n_rows), -scores))[:k])
+    print("sparse/dense equivalence: 300 random matrices OK")
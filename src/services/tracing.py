@@ -0,0 +1,220 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Histogram bucket upper bounds, in seconds: from cache lookups to long agent runs.
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Spans of the request being served: list of (name, seconds), or None outside a request.
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Histogram:
+    """Prometheus-style histogram, one series per label set."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._series = {}  # label tuple -> [bucket counts..., count, sum]
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            items = [(key, list(series)) for key, series in items]
+        for key, series in items:
+            for bound, count in zip(BUCKETS, series):
+                lines.append(f"{self.name}_bucket{_labels(key, le=str(bound))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(key, le='+Inf')} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_sum{_labels(key)} {series[-1]:.6f}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style counter, one series per label set."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._series.items())
+        lines.extend(f"{self.name}{_labels(key)} {value}" for key, value in items)
+        return lines
+
+
+def escape_label(value) -> str:
+    """A label value as the Prometheus text format requires: \\, \" and \\n escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key, **extra) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+span_seconds = Histogram("agent_span_seconds", "Duration of instrumented operations")
+llm_tokens = Counter("agent_llm_tokens_total", "Tokens sent to and received from the LLM")
+llm_calls = Counter("agent_llm_calls_total", "LLM calls")
+
+METRICS = [span_seconds, llm_tokens, llm_calls]
+
+
+def record(name: str, seconds: float, **labels):
+    """Record a finished span: histogram sample plus an entry in the current request's trace."""
+    span_seconds.observe(seconds, span=name, **labels)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.append((name, seconds))
+
+
+@contextmanager
+def span(name: str, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, **labels)
+
+
+def traced(name: str, **labels):
+    """Decorator: time every call of a sync or async function as span `name`."""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def server_timing(trace) -> str:
+    """Server-Timing header value: total duration and call count per span name."""
+    totals = {}
+    for name, seconds in trace:
+        total, count = totals.get(name, (0.0, 0))
+        totals[name] = (total + seconds, count + 1)
+    return ", ".join(
+        f'{name};dur={total * 1000.0:.2f};desc="{count}x"' for name, (total, count) in totals.items()
+    )
+
+
+def render_metrics(extra_lines=()) -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callbacks -> spans: every LLM call ("llm", with its token
+    counts) and every tool call ("tool"). Token counts come from the
+    provider's usage report, or from tiktoken when it doesn't send one.
+    """
+
+    run_inline = True  # record in the caller's context, so the request trace sees it
+
+    def __init__(self):
+        self._starts = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        prompt = "\n".join(str(m.content) for batch in messages for m in batch)
+        self._starts[run_id] = (time.perf_counter(), prompt)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = (time.perf_counter(), "\n".join(prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start, prompt = self._starts.pop(run_id, (None, ""))
+        model = (response.llm_output or {}).get("model_name", "unknown")
+        if start is not None:
+            record("llm", time.perf_counter() - start, model=model)
+        llm_calls.inc(model=model)
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        if not usage:
+            for generations in response.generations:
+                for gen in generations:
+                    meta = getattr(getattr(gen, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += meta.get("input_tokens", 0)
+                    completion_tokens += meta.get("output_tokens", 0)
+        if not prompt_tokens and not completion_tokens:
+            from services.tool_views import count_tokens  # imported late: tool_views loads the datasets
+            prompt_tokens = count_tokens(prompt)
+            completion_tokens = sum(count_tokens(gen.text) for generations in response.generations for gen in generations)
+        if prompt_tokens:
+            llm_tokens.inc(prompt_tokens, model=model, kind="prompt")
+        if completion_tokens:
+            llm_tokens.inc(completion_tokens, model=model, kind="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._starts[run_id] = (time.perf_counter(), (serialized or {}).get("name", "unknown"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            record("tool", time.perf_counter() - start[0], tool=start[1])
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+
+
+tracing_handler = TracingCallbackHandler()
+
+
+# -----------------------
+# Test block
+# -----------------------
+if __name__ == "__main__":
+    token = current_trace.set([])
+    with span("demo"):
+        time.sleep(0.01)
+    traced("demo_fn")(lambda: time.sleep(0.002))()
+    print(server_timing(current_trace.get()))
+    current_trace.reset(token)
+    print(render_metrics())